@@ -1,33 +1,124 @@
+import hashlib
+import io
+import shutil
 import sys
 import os
+import time
+import uuid
 
 import streamlit as st
 import pandas as pd
-import io
-import altair as alt
-
-def classify_dataframe(df):
-   
-    if 'category' not in df.columns:
-        df['category'] = ['Travel', 'Office Supplies', 'Utilities', 'Travel', 'Meals'] * (len(df) // 5) + (['Travel'] * (len(df) % 5))
-    if 'gst_rate' not in df.columns:
-        df['gst_rate'] = [0.18, 0.12, 0.05, 0.18, 0.00] * (len(df) // 5) + ([0.18] * (len(df) % 5))
-    if 'gst_input' not in df.columns:
-        df['gst_input'] = df['amount'].astype(float) * df['gst_rate']
-    return df
-
-def save_transactions(df):
-    print(f"Saving {len(df)} transactions to database...")
-    pass
-
-def read_pdf_bank_statement(file):
-    
-    data = {
-        'date': ['2024-05-01', '2024-05-02', '2024-05-03', '2024-05-04', '2024-05-05'],
-        'description': ['UBER RIDE 1234', 'AMAZON PRINTER INK', 'ELECTRIC BILL', 'FLIGHT INDIGO', 'LOCAL CAFE COFFEE'],
-        'amount': [500.00, 2500.00, 1800.50, 8500.00, 300.00]
-    }
-    return pd.DataFrame(data)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.export import export_file, export_to_tempfile
+
+from src import instrument, merchants, store
+from src.jobs import JobQueue
+from src.model_registry import warm_up
+from src.pipeline import iter_upload_chunks
+from src.predict import apply_schema
+from src.preprocess import normalize_columns
+
+# Streamlit reruns this script on every interaction. Uploads are previewed
+# from a cached first chunk and processed by background jobs (tracked in
+# session_state by content hash; the queue reuses finished jobs for the same
+# content and model), and the combined results are cached, so reruns do no
+# pipeline work. Exports are only built when a download is requested and
+# are served from disk.
+CACHE_TTL = 3600          # seconds
+CACHE_MAX_ENTRIES = 8     # previews / combined frames kept per cached step
+PREVIEW_ROWS = 5
+REVIEW_MAX_ROWS = 500     # flagged rows offered for correction at once
+REQUIRED_COLUMNS = ["date", "description", "amount"]
+
+# Exports are written under the app's static folder, which Streamlit serves
+# from disk in chunks (server.enableStaticServing in .streamlit/config.toml)
+STATIC_EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+DOWNLOADS = [
+    ("xlsx", "Excel", "taxbridge_output.xlsx",
+     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    ("csv", "CSV", "taxbridge_output.csv", "text/csv"),
+]
+
+
+@st.cache_resource(show_spinner="Loading model...")
+def load_model():
+    """Load the classifier once per server process."""
+    return warm_up()
+
+
+@st.cache_resource
+def job_queue():
+    """One job pool per server: its size is the concurrency limit for all users."""
+    return JobQueue()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner="Reading statement...")
+def preview_upload(digest, name, _data):
+    # _data is skipped by Streamlit's hasher; digest identifies it.
+    # Only the first chunk is read: enough for the preview and column check.
+    chunks = iter_upload_chunks(io.BytesIO(_data), name, batch_size=PREVIEW_ROWS)
+    first = next(iter(chunks), pd.DataFrame())
+    return normalize_columns(first).head(PREVIEW_ROWS)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def combine_results(job_ids, _jobs):
+    # job_ids identifies the finished jobs; _jobs is skipped by the hasher
+    result_df = pd.concat([job.result() for job in _jobs], ignore_index=True)
+    # Chunks with different category sets concatenate to object columns
+    result_df = apply_schema(result_df)
+    if "date" in result_df.columns:
+        result_df = result_df.sort_values("date", kind="stable")
+    return result_df
+
+
+def remove_old_exports():
+    """Delete published exports older than CACHE_TTL."""
+    if not os.path.isdir(STATIC_EXPORT_DIR):
+        return
+    cutoff = time.time() - CACHE_TTL
+    for entry in os.scandir(STATIC_EXPORT_DIR):
+        if entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def publish_export(df, fmt, file_name):
+    """
+    Export into the static folder, in a directory named by a random token
+    (anyone holding the link can fetch it), and return (url, path). The
+    download is then streamed from disk by Streamlit's static file server,
+    so the export is never read into memory.
+    """
+    remove_old_exports()
+    token = uuid.uuid4().hex
+    folder = os.path.join(STATIC_EXPORT_DIR, token)
+    os.makedirs(folder)
+    path = export_file(df, fmt, os.path.join(folder, file_name))
+    return f"app/static/exports/{token}/{file_name}", path
+
+
+def deferred_export(df, fmt):
+    """
+    Download-button data for servers without static serving: a callable
+    Streamlit runs only when the button is clicked. Streamlit holds what it
+    returns in memory, so this is only the fallback.
+    """
+    def read_export():
+        path = export_to_tempfile(df, fmt)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+    return read_export
+
+
+def stage_timings():
+    """This session's recent pipeline stage records, for the sidebar debug panel."""
+    return st.session_state.setdefault("stage_timings", instrument.MemorySink(maxlen=200))
+
 
 st.set_page_config(
     page_title="TaxBridge — Tax Automation and Expense Classification System",
@@ -326,6 +417,17 @@ input, textarea, select {
 
 st.markdown("<div class='main-container'>", unsafe_allow_html=True)
 
+# Debug panel: per-stage timings of this session's work (no overhead when
+# off). Sinks are scoped to the script run's context and the jobs it
+# submits, so sessions never see each other's stages. Peak memory needs
+# process-wide tracing (instrument.enable(..., memory=True)), so it is not
+# offered per session.
+show_timings = st.sidebar.checkbox("Show stage timings")
+if show_timings:
+    instrument.use(stage_timings())
+else:
+    instrument.use()
+
 
 st.markdown("<div class='app-title'>TaxBridge — Tax Automation and Expense Classification System</div>", unsafe_allow_html=True)
 st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
@@ -336,102 +438,173 @@ st.write("Upload your bank statements and classify expenses with GST applicabili
 
 st.markdown("<div class='sub-header'>Upload Bank Statement</div>", unsafe_allow_html=True)
 
-uploaded_file = st.file_uploader(
+uploaded_files = st.file_uploader(
     "Choose PDF, CSV, or Excel",
-    type=["pdf", "csv", "xlsx"]
+    type=["pdf", "csv", "xlsx"],
+    accept_multiple_files=True
 )
 
-if uploaded_file is not None:
 
-  
-    if uploaded_file.name.endswith(".pdf"):
+def job_progress(digests):
+    """Per-file progress and partial results."""
+    jobs = [st.session_state["jobs"][d] for d in digests]
+    for job in jobs:
+        if job.status == "queued":
+            text = f"{job.name}: queued"
+        elif job.status == "running":
+            text = f"{job.name}: {job.rows:,} rows classified ({job.elapsed():.0f}s)"
+        elif job.status == "done":
+            text = f"{job.name}: {job.rows:,} rows in {job.elapsed():.1f}s, saved to database"
+        else:
+            text = f"{job.name}: failed"
+        st.progress(job.progress(), text=text)
+        if job.error:
+            st.error(f"{job.name}: {job.error}")
+        elif job.status == "running" and job.chunks:
+            st.dataframe(job.chunks[0].head(), use_container_width=True)
+
+    stats = job_queue().stats()
+    if stats["queued"]:
+        st.caption(f"Server busy: {stats['running']} of {stats['max_workers']} slots in use, "
+                   f"{stats['queued']} files waiting.")
+
+    # When a file finishes, rerun the whole page so the summaries include it
+    # (and so the page switches to the static progress once none is active)
+    finished = tuple(job.id for job in jobs if not job.active)
+    if finished != st.session_state.get("jobs_finished"):
+        st.session_state["jobs_finished"] = finished
+        st.rerun()
+
+
+# Refreshes itself every second, so it is only used while a job is queued
+# or running; once none is, job_progress is drawn once and the timer stops.
+live_job_progress = st.fragment(run_every=1)(job_progress)
+
+
+if uploaded_files:
+
+    # Jobs outlive reruns; a file is only processed again if its last job failed
+    jobs = st.session_state.setdefault("jobs", {})
+    owner = st.session_state.setdefault("owner", uuid.uuid4().hex)
+
+    # Files that fail to read or lack required columns are not submitted
+    uploads = {}
+    previews = {}
+    for uploaded_file in uploaded_files:
+        name, content = uploaded_file.name, uploaded_file.getvalue()
+        digest = hashlib.sha256(content).hexdigest()
         try:
-            df = read_pdf_bank_statement(uploaded_file)
-            st.success("PDF parsed successfully.")
+            preview = preview_upload(digest, name, content)
         except Exception as e:
-            st.error(f"PDF extraction failed: {e}")
-            st.stop()
-
-    elif uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-
-    else:
-        if uploaded_file.name.endswith(".xlsx"):
-             df = pd.read_excel(uploaded_file)
-        else:
-             
-             df = pd.read_excel(uploaded_file)
-
-   
-    required_cols = ["date", "description", "amount"]
-    # Check if a mock DataFrame needs to be generated for non-PDF files for the demo
-    if df.empty and uploaded_file.name != 'taxbridge_output.xlsx':
-        st.warning("Generating mock data since the uploaded file is empty or missing data for the demo.")
-        data = {
-            'date': ['2024-05-01', '2024-05-02', '2024-05-03', '2024-05-04', '2024-05-05'],
-            'description': ['UBER RIDE 1234', 'AMAZON PRINTER INK', 'ELECTRIC BILL', 'FLIGHT INDIGO', 'LOCAL CAFE COFFEE'],
-            'amount': [500.00, 2500.00, 1800.50, 8500.00, 300.00]
-        }
-        df = pd.DataFrame(data)
-
-    missing = [c for c in required_cols if c not in df.columns]
-
-    if missing:
-        st.error(f"Your file is missing required columns: {', '.join(missing)}")
-        st.stop()
-
-
-    st.markdown("<div class='sub-header'>Preview</div>", unsafe_allow_html=True)
-    st.dataframe(df.head(), use_container_width=True)
+            st.error(f"{name}: statement extraction failed: {e}")
+            continue
+        missing = [c for c in REQUIRED_COLUMNS if c not in preview.columns]
+        if missing:
+            st.error(f"{name} is missing required columns: {', '.join(missing)}")
+            continue
+        uploads[digest] = (name, content)
+        previews[name] = preview
+
+    if previews:
+        st.markdown("<div class='sub-header'>Preview</div>", unsafe_allow_html=True)
+        for name, preview in previews.items():
+            st.caption(name)
+            st.dataframe(preview, use_container_width=True)
 
 
-   
     if st.button("Classify Expenses", use_container_width=True):
-
         try:
-            result_df = classify_dataframe(df)
-            st.success("Classification complete.")
+            load_model()
         except Exception as e:
             st.error(f"Classification error: {e}")
             st.stop()
 
-       
-        try:
-            result_df["date"] = pd.to_datetime(result_df["date"])
-            result_df = result_df.sort_values("date")
-        except:
-            pass
+        for digest, (name, content) in uploads.items():
+            job = jobs.get(digest)
+            if job is None or job.status == "failed":
+                jobs[digest] = job_queue().submit(owner, name, content, digest)
 
 
-        st.markdown("<div class='sub-header'>Classified Output</div>", unsafe_allow_html=True)
-        st.dataframe(result_df, use_container_width=True)
+    submitted = [d for d in uploads if d in jobs]
+    if submitted:
+        st.markdown("<div class='sub-header'>Processing</div>", unsafe_allow_html=True)
+        if any(jobs[d].active for d in submitted):
+            live_job_progress(submitted)
+        else:
+            job_progress(submitted)
 
+    finished = [jobs[d] for d in submitted if jobs[d].status == "done"]
+    if finished:
 
-       
-        try:
-            save_transactions(result_df)
-            st.info("Saved to database.")
-        except:
-            st.warning("Could not save to database.")
+        job_ids = tuple(job.id for job in finished)
+        digest = hashlib.sha256("|".join(job_ids).encode()).hexdigest()
+        result_df = combine_results(job_ids, finished)
+        if any(jobs[d].active for d in submitted):
+            st.info(f"Showing {len(finished)} of {len(submitted)} files; the rest are still processing.")
 
 
-        try:
-            total_spend = result_df["amount"].astype(float).sum()
-        except:
-            total_spend = 0
+        st.markdown("<div class='sub-header'>Classified Output</div>", unsafe_allow_html=True)
+        st.dataframe(result_df, use_container_width=True)
 
+        if "label_source" in result_df.columns:
+            matched = (result_df["label_source"] == "merchant").mean()
+            flagged = result_df[result_df["needs_review"]]
+            st.caption(
+                f"{matched:.0%} of rows matched known merchants; "
+                f"{len(flagged):,} low-confidence predictions flagged for review."
+            )
+            if len(flagged):
+                with st.expander(f"Review flagged rows ({len(flagged):,})"):
+                    # Corrections become confirmed merchant labels for future uploads
+                    shown = (
+                        flagged[["description", "predicted_category", "confidence"]]
+                        .head(REVIEW_MAX_ROWS)
+                        .astype({"predicted_category": str})
+                    )
+                    review = st.data_editor(
+                        shown,
+                        column_config={
+                            "predicted_category": st.column_config.SelectboxColumn(
+                                "Category",
+                                options=sorted(result_df["predicted_category"].cat.categories),
+                            ),
+                        },
+                        disabled=["description", "confidence"],
+                        use_container_width=True,
+                        key=f"review_{digest}",
+                    )
+                    # Only rows the user actually re-labelled are confirmed
+                    corrected = review[review["predicted_category"] != shown["predicted_category"]]
+                    if st.button("Save as confirmed labels", key=f"confirm_{digest}",
+                                 disabled=corrected.empty):
+                        added = merchants.confirm_labels(
+                            corrected.rename(columns={"predicted_category": "category"})
+                        )
+                        st.success(f"Saved {len(added)} merchants; they apply to new uploads.")
+
+
+        # Dashboard figures come from the transaction store the jobs saved
+        # each chunk to (the SQLite rollups, or the Parquet months with
+        # TAXBRIDGE_STORE=parquet): every stored transaction in the months
+        # these statements cover, previous uploads included.
+        dates = result_df["date"].dropna()
+        start_month = dates.min().strftime("%Y-%m") if len(dates) else None
+        end_month = dates.max().strftime("%Y-%m") if len(dates) else None
+        transactions = store.get_store()
+        totals = transactions.summary_totals(start_month, end_month)
+
+        total_spend = totals["total_spend"]
         st.markdown(f"<h3 style='color: #60a5ff; text-align: center; font-weight: 800; font-size: 28px; margin-top: 40px;'>Total Spend: ₹ {total_spend:,.2f}</h3>", unsafe_allow_html=True)
+        if start_month:
+            st.caption(f"All saved transactions from {start_month} to {end_month}.")
 
 
         st.markdown("<div class='sub-header'>GST Summary</div>", unsafe_allow_html=True)
 
-        try:
-            gst_input_total = result_df["gst_input"].astype(float).sum()
-            gst_applicable = result_df[result_df["gst_rate"] > 0].shape[0]
-            gst_not_applicable = result_df[result_df["gst_rate"] == 0].shape[0]
-            taxable_spend = result_df[result_df["gst_rate"] > 0]["amount"].astype(float).sum()
-        except:
-            gst_input_total = gst_applicable = gst_not_applicable = taxable_spend = 0
+        gst_input_total = totals["gst_input"]
+        gst_applicable = int(totals["gst_applicable"])
+        gst_not_applicable = int(totals["gst_not_applicable"])
+        taxable_spend = totals["taxable_spend"]
 
         col1, col2, col3, col4 = st.columns(4)
 
@@ -472,27 +645,18 @@ if uploaded_file is not None:
         st.markdown("<br><div class='sub-header'>Monthly Expense Trend</div>", unsafe_allow_html=True)
 
         try:
-        
-            result_df["date"] = pd.to_datetime(result_df["date"])
-
-          
-            monthly = (
-                result_df
-                .groupby(result_df["date"].dt.to_period("M"))["amount"]
-                .sum()
-                .reset_index()
-            )
+            monthly = transactions.monthly_summary(start_month, end_month)
 
-           
-            monthly["month"] = monthly["date"].astype(str)
+            # Altair (and its jsonschema stack) is only needed for this chart
+            import altair as alt
 
             chart = (
                 alt.Chart(monthly)
                 .mark_line(point=alt.OverlayMarkDef(filled=True, size=60))
                 .encode(
                     x=alt.X("month:N", title="Month"),
-                    y=alt.Y("amount:Q", title="Total Expense"),
-                    tooltip=["month:N", alt.Tooltip("amount:Q", format=",.2f")]
+                    y=alt.Y("total_spend:Q", title="Total Expense"),
+                    tooltip=["month:N", alt.Tooltip("total_spend:Q", format=",.2f")]
                 )
                 .properties(height=380)
                 .interactive()
@@ -505,34 +669,42 @@ if uploaded_file is not None:
 
         st.markdown("<div class='sub-header'>Download Results</div>", unsafe_allow_html=True)
 
-        buffer = io.BytesIO()
-        result_df.to_excel(buffer, index=False, engine="openpyxl")
-        buffer.seek(0)
-
-       
-        st.download_button(
-            label="Download Excel",
-            data=buffer,
-            file_name="taxbridge_output.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True,
-            key="excel_download",
-            help="Download Excel",
-            type="primary",
-        )
-
-        csv_data = result_df.to_csv(index=False).encode("utf-8")
-        
-        st.download_button(
-            label="Download CSV",
-            data=csv_data,
-            file_name="taxbridge_output.csv",
-            mime="text/csv",
-            use_container_width=True,
-            key="csv_download",
-            help="Download CSV",
-            type="primary",
-        )
+        if st.get_option("server.enableStaticServing"):
+            # Written when requested, never on reruns; the link is served from disk
+            published = st.session_state.setdefault("exports", {})
+            for fmt, label, file_name, _ in DOWNLOADS:
+                url, path = published.get((digest, fmt), (None, None))
+                if path and not os.path.exists(path):  # removed after CACHE_TTL
+                    url = None
+                if url is None and st.button(f"Prepare {label} download", key=f"prepare_{fmt}",
+                                             use_container_width=True):
+                    with st.spinner(f"Writing {label} file..."):
+                        url, path = published[(digest, fmt)] = publish_export(result_df, fmt, file_name)
+                if url:
+                    st.markdown(f"<a href='{url}' download='{file_name}'>Download {label}</a>",
+                                unsafe_allow_html=True)
+        else:
+            for fmt, label, file_name, mime in DOWNLOADS:
+                st.download_button(
+                    label=f"Download {label}",
+                    data=deferred_export(result_df, fmt),
+                    file_name=file_name,
+                    mime=mime,
+                    use_container_width=True,
+                    key=f"{fmt}_download",
+                    help=f"Download {label}",
+                    type="primary",
+                )
+
+
+# Cached steps only show up when they actually ran
+if show_timings:
+    records = list(stage_timings().records)
+    if records:
+        timings = pd.DataFrame(records)[["stage", "rows", "wall_s", "cpu_s", "error"]]
+        st.sidebar.dataframe(timings.iloc[::-1], use_container_width=True)
+    if st.sidebar.button("Clear timings"):
+        stage_timings().clear()
 
 
 # END MAIN CONTAINER
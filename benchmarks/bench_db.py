@@ -0,0 +1,93 @@
+"""
+Insert throughput of save_transactions against the old to_sql path.
+
+    python -m benchmarks.bench_db --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import db
+from src.preprocess import clean_text_series
+
+CATEGORIES = ["food", "travel", "office", "utilities", "software", "fuel"]
+
+# What the original save_transactions stored
+LEGACY_COLUMNS = ["date", "description", "amount", "predicted_category", "deductible"]
+
+
+def make_frame(rows, seed=0):
+    """A classified frame, as classify_dataframe hands it to save_transactions."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "description": [f"UPI/{n}/MERCHANT {n % 500}/Payment" for n in rng.integers(0, 10**9, rows)],
+        "amount": rng.uniform(10, 50_000, rows).round(2),
+        "predicted_category": rng.choice(CATEGORIES, rows),
+        "deductible": rng.integers(0, 2, rows),
+        "gst_rate": rng.choice([0, 5, 12, 18], rows),
+    })
+    df["gst_input"] = (df["amount"] * df["gst_rate"] / 100).round(2)
+    df["clean_desc"] = clean_text_series(df["description"])
+    return df
+
+
+def old_save(df, path, indexed=False):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        description TEXT,
+        amount REAL,
+        predicted_category TEXT,
+        deductible INTEGER
+    )
+    ''')
+    if indexed:
+        # Same indexes as the new schema, maintained row by row by to_sql
+        db.create_indexes(conn)
+    conn.commit()
+    df[LEGACY_COLUMNS].to_sql("transactions", conn, if_exists="append", index=False)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        new_path = os.path.join(tmp, "new.db")
+
+        t0 = time.perf_counter()
+        old_save(df, os.path.join(tmp, "old.db"))
+        t1 = time.perf_counter()
+        old_save(df, os.path.join(tmp, "old_indexed.db"), indexed=True)
+        t2 = time.perf_counter()
+        db.save_transactions(df, new_path)
+        t3 = time.perf_counter()
+        again = db.save_transactions(df, new_path)
+        t4 = time.perf_counter()
+        assert again["skipped"] == args.rows, again
+
+        (count,) = db.get_connection(new_path).execute("SELECT COUNT(*) FROM transactions").fetchone()
+        assert count == args.rows, count
+        db.close_connections()
+
+    print(f"rows:                 {args.rows}")
+    print(f"to_sql, no indexes:   {t1 - t0:.2f}s ({args.rows / (t1 - t0):,.0f} rows/s)")
+    print(f"to_sql, with indexes: {t2 - t1:.2f}s ({args.rows / (t2 - t1):,.0f} rows/s)")
+    print(f"save_transactions:    {t3 - t2:.2f}s ({args.rows / (t3 - t2):,.0f} rows/s)")
+    print(f"re-ingest (no-op):    {t4 - t3:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
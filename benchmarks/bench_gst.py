@@ -0,0 +1,68 @@
+"""
+Compare the row-wise GST detection against the vectorized engine.
+
+    python -m benchmarks.bench_gst --rows 200000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from src.predict import GST_KEYWORDS, detect_gst, detect_gst_series, gst_input
+
+FILLER = ["upi", "neft", "imps", "payment", "to", "ref", "transfer", "bill", "pos", "ach"]
+
+
+def make_frame(rows, seed=0):
+    rng = random.Random(seed)
+    keywords = [w for words in GST_KEYWORDS.values() for w in words]
+    desc = []
+    for _ in range(rows):
+        words = rng.sample(FILLER, 4)
+        if rng.random() < 0.6:
+            words.insert(rng.randrange(5), rng.choice(keywords))
+        desc.append(" ".join(words) + f" {rng.randint(1000, 999999)}")
+    amount = [round(rng.uniform(10, 50000), 2) for _ in range(rows)]
+    return pd.DataFrame({"clean_desc": desc, "amount": amount})
+
+
+def rowwise(df):
+    rate = df["clean_desc"].apply(detect_gst)
+    out = df.assign(gst_rate=rate)
+    return rate, out.apply(
+        lambda row: round((row["amount"] * row["gst_rate"]) / 100, 2)
+        if row["gst_rate"] > 0 else 0,
+        axis=1
+    )
+
+
+def vectorized(df):
+    rate = detect_gst_series(df["clean_desc"])
+    return rate, gst_input(df["amount"], rate)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+
+    t0 = time.perf_counter()
+    old_rate, old_input = rowwise(df)
+    t1 = time.perf_counter()
+    new_rate, new_input = vectorized(df)
+    t2 = time.perf_counter()
+
+    assert (old_rate.to_numpy() == new_rate.to_numpy()).all(), "rate mismatch"
+    assert (old_input.to_numpy(dtype=float) == new_input).all(), "gst_input mismatch"
+
+    print(f"rows:        {args.rows}")
+    print(f"row-wise:    {t1 - t0:.3f}s")
+    print(f"vectorized:  {t2 - t1:.3f}s")
+    print(f"speedup:     {(t1 - t0) / (t2 - t1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the joblib Pipeline against the compiled NumPy artifact: cold start
+in a fresh interpreter, per-batch predict latency, and prediction equality.
+
+    python -m benchmarks.bench_inference --rows 100000 --batch 5000
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_gst import make_frame
+from src.fast_predict import load_model
+from src.model_registry import COMPILED_MODEL_PATH, MODEL_PATH
+
+COLD_START = (
+    "import time; t = time.perf_counter(); "
+    "from src.model_registry import get_model; "
+    "get_model({path!r}).predict(['uber ride to airport']); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def cold_start(path, repeat):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START.format(path=path)],
+            capture_output=True, text=True, check=True,
+        )
+        times.append(float(out.stdout.strip()))
+    return min(times)
+
+
+def batch_latency(model, docs, batch):
+    times = []
+    for start in range(0, len(docs), batch):
+        t0 = time.perf_counter()
+        model.predict(docs[start:start + batch])
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import joblib
+
+    pipeline = joblib.load(MODEL_PATH)
+    compiled = load_model(COMPILED_MODEL_PATH)
+    docs = make_frame(args.rows)["clean_desc"].tolist()
+
+    expected = pipeline.predict(docs)
+    actual = compiled.predict(docs)
+    mismatches = int((np.asarray(expected) != actual).sum())
+    proba_diff = np.abs(pipeline.predict_proba(docs[:1000]) - compiled.predict_proba(docs[:1000])).max()
+
+    joblib_cold = cold_start(MODEL_PATH, args.repeat)
+    npz_cold = cold_start(COMPILED_MODEL_PATH, args.repeat)
+    joblib_batch = batch_latency(pipeline, docs, args.batch)
+    npz_batch = batch_latency(compiled, docs, args.batch)
+
+    print(f"rows:          {args.rows}  (batch {args.batch})")
+    print(f"mismatches:    {mismatches}  (max predict_proba diff {proba_diff:.2e})")
+    print(f"cold start:    joblib {joblib_cold:.3f}s   npz {npz_cold:.3f}s")
+    print(f"batch predict: joblib {joblib_batch * 1000:.1f}ms  npz {npz_batch * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Time and peak memory of the PDF report on a large classified frame.
+
+    python -m benchmarks.bench_report --rows 100000
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.bench_db import make_frame
+from src.export_pdf import generate_pdf_report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--by-month", action="store_true")
+    parser.add_argument("--summary-only", action="store_true")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.pdf")
+        t0 = time.perf_counter()
+        generate_pdf_report(df, path, summary_only=args.summary_only, by_month=args.by_month)
+        elapsed = time.perf_counter() - t0
+        size = os.path.getsize(path)
+
+    # ru_maxrss is KiB on Linux
+    growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    print(f"rows:            {args.rows}")
+    print(f"time:            {elapsed:.2f}s")
+    print(f"peak RSS growth: {growth:.0f} MB")
+    print(f"file size:       {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
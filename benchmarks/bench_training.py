@@ -0,0 +1,86 @@
+"""
+Compare the full TF-IDF refit against out-of-core incremental training:
+time, peak Python memory and hold-out accuracy, plus a warm start on new rows.
+
+    python -m benchmarks.bench_training --data data/training.csv --rows 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.preprocess import prepare_dataframe
+from src.train_model import TRAINING_PATH, train_full, train_incremental
+
+
+def make_frame(data, rows, seed=0):
+    """Resample the labelled CSV to `rows` rows with fresh reference numbers."""
+    df = pd.read_csv(data)
+    if not rows:
+        return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    df = df.iloc[rng.integers(0, len(df), rows)].reset_index(drop=True)
+    desc_col = next(c for c in df.columns if c.lower() in ("narration", "description"))
+    refs = pd.Series(rng.integers(1000, 999999, rows).astype(str))
+    df[desc_col] = df[desc_col].astype(str).str.replace(r"\d+", "", regex=True).str.strip() + " " + refs
+    return df
+
+
+def measure(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def accuracy(pipeline, test):
+    return float((pipeline.predict(test["clean_desc"]) == test["category"].astype(str)).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=TRAINING_PATH)
+    parser.add_argument("--rows", type=int, default=0, help="resample to this many rows (0: as is)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.data, args.rows)
+    cut = int(len(df) * 0.8)
+    test = prepare_dataframe(df.iloc[cut:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        train_path = os.path.join(tmp, "train.csv")
+        old_path = os.path.join(tmp, "old.csv")
+        new_path = os.path.join(tmp, "new.csv")
+        df.iloc[:cut].to_csv(train_path, index=False)
+        df.iloc[:cut // 2].to_csv(old_path, index=False)
+        df.iloc[cut // 2:cut].to_csv(new_path, index=False)
+
+        full, full_s, full_mb = measure(train_full, train_path)
+        inc, inc_s, inc_mb = measure(
+            lambda p: train_incremental(p, chunk_rows=args.chunk_size), train_path)
+
+        base = train_incremental(old_path, chunk_rows=args.chunk_size)
+        base_acc = accuracy(base, test)
+        t0 = time.perf_counter()
+        warm = train_incremental(new_path, base, chunk_rows=args.chunk_size)
+        warm_s = time.perf_counter() - t0
+
+    print(f"train rows:   {cut}  (test {len(test)})")
+    print(f"full refit:   {full_s:7.2f}s  peak {full_mb:8.1f} MB  accuracy {accuracy(full, test):.4f}")
+    print(f"incremental:  {inc_s:7.2f}s  peak {inc_mb:8.1f} MB  accuracy {accuracy(inc, test):.4f}")
+    print(f"warm start:   {warm_s:7.2f}s  on {cut - cut // 2} new rows, "
+          f"accuracy {base_acc:.4f} -> {accuracy(warm, test):.4f}")
+
+
+if __name__ == "__main__":
+    main()
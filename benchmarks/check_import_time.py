@@ -0,0 +1,86 @@
+"""
+Import-time budget check, based on `python -X importtime`.
+
+Each src module is imported in a fresh interpreter. The check fails (exit
+status 1) when a module pulls in a heavy optional dependency at import time,
+or when its import costs more than BUDGET_MS on top of pandas, which every
+module needs anyway and which dominates startup.
+
+    python -m benchmarks.check_import_time
+"""
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "src.model_registry",
+    "src.fast_predict",
+    "src.preprocess",
+    "src.db",
+    "src.predict",
+    "src.prediction_cache",
+    "src.export",
+    "src.export_pdf",
+    "src.read_pdf",
+    "src.pipeline",
+    "src.batch",
+]
+
+# Only loaded on first PDF parse, PDF export, chart, XLSX I/O or pickle load
+HEAVY = ["reportlab", "pdfplumber", "pdfminer", "sklearn", "scipy", "joblib", "altair", "openpyxl"]
+
+# Allowed import cost of a src module beyond `import pandas`, in milliseconds
+BUDGET_MS = 150
+
+
+def import_profile(module):
+    """Return ({imported module: cumulative µs}) for importing `module`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def best_of(module, repeat):
+    """Cheapest of `repeat` runs, which filters out scheduler noise."""
+    runs = [import_profile(module) for _ in range(repeat)]
+    return min(runs, key=lambda p: p[module])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    baseline = best_of("pandas", args.repeat)["pandas"] / 1000
+    print(f"{'pandas (baseline)':24} {baseline:8.1f} ms")
+
+    failures = []
+    for module in MODULES:
+        profile = best_of(module, args.repeat)
+        total = profile[module] / 1000
+        heavy = sorted({name.split(".")[0] for name in profile} & set(HEAVY))
+        over = total - baseline > args.budget_ms
+        status = "FAIL" if heavy or over else "ok"
+        print(f"{module:24} {total:8.1f} ms  ({total - baseline:+7.1f})  {status}"
+              + (f"  imports {', '.join(heavy)}" if heavy else ""))
+        if heavy or over:
+            failures.append(module)
+
+    if failures:
+        print(f"Import budget exceeded by: {', '.join(failures)}")
+        return 1
+    print(f"All modules within +{args.budget_ms:.0f} ms of pandas and free of heavy imports.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
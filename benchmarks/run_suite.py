@@ -0,0 +1,205 @@
+"""
+Time and memory-profile every pipeline stage on synthetic statements.
+
+    python -m benchmarks.run_suite --rows 1000,10000,100000 --out bench_results
+    python -m benchmarks.run_suite --rows 10000 --compare bench_results/<earlier>.json
+
+Stages: read (csv/xlsx/pdf), normalize, clean, predict, gst, save and
+export (csv/xlsx/pdf). Each stage reports wall time, CPU time, rows/s and,
+unless --no-memory, the tracemalloc peak of a second, traced run. Results
+are written as JSON so runs can be compared over time.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_statement, write_statement
+from src.db import close_connections, save_transactions
+from src.export import export_to_tempfile
+from src.export_pdf import generate_pdf_report
+from src.pipeline import read_upload
+from src import merchants
+from src.predict import detect_gst_series, gst_input, predict_categories
+from src.preprocess import clean_text_series, normalize_columns
+
+STAGES = ["read", "normalize", "clean", "merchants", "predict", "gst", "save", "export"]
+
+# PDF generation, parsing and rendering run at a few hundred rows/s;
+# larger sizes are capped so a 1M-row run finishes the same day.
+PDF_MAX_ROWS = 20_000
+
+TRAINING_ROWS = 20_000
+
+
+def measure(fn, memory):
+    """Run fn once timed, then (optionally) once more under tracemalloc."""
+    gc.collect()
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, wall, cpu, peak
+
+
+def train_model():
+    """
+    An in-memory model and merchant index trained on labelled synthetic
+    rows (no files touched).
+    """
+    from src.train_model import build_pipeline
+
+    df = normalize_columns(make_statement(TRAINING_ROWS, seed=1, labels=True))
+    pipeline = build_pipeline()
+    pipeline.fit(clean_text_series(df["description"]), df["category"])
+    return pipeline, merchants.build_index(df)
+
+
+def run_size(rows, formats, model, index, tmp, memory, stages):
+    results = []
+
+    def record(stage, fn, n=rows, fmt=None):
+        if stage.split("_")[0] not in stages:
+            return None
+        result, wall, cpu, peak = measure(fn, memory)
+        entry = {
+            "stage": stage if fmt is None else f"{stage}_{fmt}",
+            "rows": n,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rows_per_s": round(n / wall) if wall else None,
+            "peak_mb": None if peak is None else round(peak, 2),
+        }
+        results.append(entry)
+        mem = "" if peak is None else f"  peak {peak:9.1f} MB"
+        print(f"  {entry['stage']:12} {n:>9} rows  {wall:8.3f}s  cpu {cpu:8.3f}s  "
+              f"{entry['rows_per_s'] or 0:>11,} rows/s{mem}")
+        return result
+
+    statement = make_statement(rows)
+
+    # read
+    for fmt in formats:
+        n = min(rows, PDF_MAX_ROWS) if fmt == "pdf" else rows
+        path = os.path.join(tmp, f"statement_{n}.{fmt}")
+        if not os.path.exists(path):
+            write_statement(statement.iloc[:n], path, fmt)
+        record("read", lambda: read_upload(path), n, fmt)
+
+    df = record("normalize", lambda: normalize_columns(statement)) \
+        if "normalize" in stages else normalize_columns(statement)
+    clean = record("clean", lambda: clean_text_series(df["description"])) \
+        if "clean" in stages else clean_text_series(df["description"])
+    df["clean_desc"] = clean
+
+    known, _ = record("merchants", lambda: merchants.lookup(df["description"], index)) \
+        if "merchants" in stages else merchants.lookup(df["description"], index)
+    print(f"  {'':12} {pd.notna(known).mean():.1%} of rows matched the merchant index")
+
+    # Model-only, so predict timings stay comparable across runs
+    category = record("predict", lambda: predict_categories(model, clean)) \
+        if "predict" in stages else predict_categories(model, clean)
+    df["predicted_category"] = category
+    df["deductible"] = np.isin(category, ["travel", "office", "fuel", "utilities"]).astype(int)
+
+    def gst():
+        rate = detect_gst_series(clean)
+        return rate, gst_input(df["amount"], rate)
+
+    df["gst_rate"], df["gst_input"] = record("gst", gst) if "gst" in stages else gst()
+
+    # Each run saves into a fresh database so the traced run does the same work
+    counter = iter(range(1_000_000))
+    record("save", lambda: save_transactions(df, path=os.path.join(tmp, f"bench_{rows}_{next(counter)}.db")))
+    close_connections()
+
+    for fmt in ["csv", "xlsx"]:
+        def export(fmt=fmt):
+            os.remove(export_to_tempfile(df, fmt))
+        record("export", export, rows, fmt)
+
+    n = min(rows, PDF_MAX_ROWS)
+    record("export", lambda: generate_pdf_report(df.iloc[:n], os.path.join(tmp, "report.pdf")), n, "pdf")
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {(r["stage"], r["rows"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {previous_path} (wall time ratio, <1 is faster):")
+    for r in results:
+        old = previous.get((r["stage"], r["rows"]))
+        if old and old["wall_s"]:
+            print(f"  {r['stage']:12} {r['rows']:>9} rows  {r['wall_s'] / old['wall_s']:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,10000", help="comma-separated sizes (1k to 1M)")
+    parser.add_argument("--formats", default="csv,xlsx,pdf", help="statement formats to read")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--out", default="bench_results", help="directory for the JSON results")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.rows.split(",")]
+    formats = args.formats.split(",")
+    stages = set(args.stages.split(","))
+
+    model, index = train_model()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            print(f"{rows} rows:")
+            results += run_size(rows, formats, model, index, tmp, not args.no_memory, stages)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "memory_profiled": not args.no_memory,
+        },
+        "results": results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
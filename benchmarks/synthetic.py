@@ -0,0 +1,145 @@
+"""
+Synthetic Indian-bank-style statements for benchmarks.
+
+    python -m benchmarks.synthetic --rows 100000 --formats csv,xlsx,pdf --out bench_data
+
+Narrations follow the UPI / NEFT / IMPS / POS / ACH layouts banks print,
+amounts are split into withdrawal and deposit columns, dates are dd/mm/yyyy.
+With --labels a `category` column is added, usable as training data.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# category -> merchants; several carry the GST keywords predict looks for
+MERCHANTS = {
+    "food": ["SWIGGY", "ZOMATO", "DOMINOS PIZZA", "HALDIRAM RESTAURANT", "CAFE COFFEE DAY"],
+    "travel": ["UBER INDIA", "OLA CABS", "IRCTC TICKET", "INDIGO FLIGHT", "MAKEMYTRIP"],
+    "office": ["AMAZON PRINTER INK", "OFFICE CHAIR STORE", "STAPLES OFFICE", "CROMA ELECTRONICS"],
+    "utilities": ["BESCOM POWER", "AIRTEL INTERNET", "JIO WIFI RECHARGE", "TATA POWER", "MAHANAGAR GAS"],
+    "software": ["GOOGLE WORKSPACE", "CANVA PRO SUBSCRIPTION", "ADOBE SYSTEMS", "MICROSOFT 365", "ZOHO CORP"],
+    "fuel": ["HP PETROL PUMP", "IOCL FUEL", "BHARAT PETROLEUM", "SHELL FUEL STATION"],
+}
+
+BANKS = ["HDFC", "ICICI", "SBIN", "UTIB", "KKBK", "YESB"]
+HANDLES = ["okaxis", "okhdfcbank", "ybl", "paytm", "oksbi", "ibl"]
+
+# Column names as most bank exports print them (see preprocess / read_pdf maps)
+COLUMNS = ["Txn Date", "Narration", "Withdrawal Amt", "Deposit Amt", "Balance"]
+
+
+def _narrations(rng, merchants):
+    """Wrap merchant names in one of the usual payment-rail layouts."""
+    n = len(merchants)
+    ref = rng.integers(10**9, 10**12, n).astype(str)
+    bank = np.asarray(BANKS)[rng.integers(0, len(BANKS), n)]
+    handle = np.asarray(HANDLES)[rng.integers(0, len(HANDLES), n)]
+    vpa = pd.Series(merchants).str.split().str[0].str.lower().to_numpy()
+
+    layouts = [
+        "UPI/" + ref + "/" + merchants + "/" + vpa + "@" + handle + "/Payment",
+        "NEFT/" + bank + "N" + ref + "/" + merchants,
+        "IMPS/P2M/" + ref + "/" + merchants,
+        "POS " + ref.astype("U4") + "XXXXXX " + merchants,
+        "ACH D- " + merchants + "-" + ref,
+    ]
+    choice = rng.choice(len(layouts), n, p=[0.5, 0.15, 0.1, 0.15, 0.1])
+    return np.choose(choice, layouts)
+
+
+def make_statement(rows, seed=0, labels=False, start="2024-04-01", days=365):
+    """A raw statement frame with `rows` transactions, as a bank would export it."""
+    rng = np.random.default_rng(seed)
+    categories = np.asarray(list(MERCHANTS))
+    category = categories[rng.integers(0, len(categories), rows)]
+    merchant = np.empty(rows, dtype=object)
+    for cat, names in MERCHANTS.items():
+        mask = category == cat
+        merchant[mask] = np.asarray(names)[rng.integers(0, len(names), mask.sum())]
+    merchant = merchant.astype(str)
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit="D")
+    # Long-tailed amounts: mostly small spends, some large transfers
+    amount = np.round(np.exp(rng.normal(7, 1.4, rows)).clip(1, 5_00_000), 2)
+    debit = rng.random(rows) < 0.85
+
+    df = pd.DataFrame({
+        "Txn Date": dates.strftime("%d/%m/%Y"),
+        "Narration": _narrations(rng, merchant),
+        "Withdrawal Amt": np.where(debit, amount, np.nan),
+        "Deposit Amt": np.where(debit, np.nan, amount),
+    })
+    df["Balance"] = np.round(1_00_000 + np.cumsum(np.where(debit, -amount, amount)), 2)
+    if labels:
+        df["category"] = category
+    return df
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+    return path
+
+
+def write_xlsx(df, path):
+    from src.export import write_xlsx as _write_xlsx
+    return _write_xlsx(df, path)
+
+
+def write_pdf(df, path, rows_per_page=35):
+    """A tabular PDF statement with the header repeated on every page."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+    # Amounts printed the way statements print them: 1,234.50 and blanks
+    cells = df[COLUMNS].copy()
+    for col in ["Withdrawal Amt", "Deposit Amt", "Balance"]:
+        values = cells[col]
+        cells[col] = values.map("{:,.2f}".format).where(values.notna(), "")
+    body = cells.astype(str).values.tolist()
+
+    style = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                        ("FONTSIZE", (0, 0), (-1, -1), 7)])
+    elements = []
+    for start in range(0, len(body), rows_per_page):
+        elements.append(Table([COLUMNS] + body[start:start + rows_per_page],
+                              colWidths=[55, 250, 70, 70, 70], style=style))
+        elements.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=A4, leftMargin=20, rightMargin=20).build(elements)
+    return path
+
+
+WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "pdf": write_pdf,
+}
+
+
+def write_statement(df, path, fmt):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported statement format: {fmt}")
+    return WRITERS[fmt](df, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic bank statements.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--formats", default="csv", help="comma-separated: csv,xlsx,pdf")
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--labels", action="store_true", help="add a category column")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    df = make_statement(args.rows, args.seed, args.labels)
+    for fmt in args.formats.split(","):
+        path = os.path.join(args.out, f"statement_{args.rows}.{fmt}")
+        write_statement(df, path, fmt)
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
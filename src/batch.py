@@ -0,0 +1,183 @@
+"""
+Classify a directory of bank statements headlessly.
+
+    python -m src.batch statements/ --workers 4 [--store parquet]
+
+Files are processed on a process pool; each worker loads the model once.
+The parent loads the model and creates (migrates) the store first, so a
+missing model fails with a plain error and workers never race to migrate.
+Completed files are recorded in a progress file so an interrupted run
+resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from src.db import close_connections
+from src.model_registry import warm_up
+from src.pipeline import BATCH_SIZE, ingest_file
+from src.store import STORES, init_store, store_name
+
+STATEMENT_TYPES = {".pdf", ".csv", ".xlsx", ".xls"}
+PROGRESS_FILE = ".taxbridge_progress.jsonl"
+
+
+def discover(directory, recursive=False):
+    """Return the statement files under `directory`, sorted by path."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        p for p in Path(directory).glob(pattern)
+        if p.is_file() and p.suffix.lower() in STATEMENT_TYPES
+    )
+
+
+def _file_key(path):
+    stat = path.stat()
+    return {"file": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def load_progress(progress_path):
+    """Return {file: record} for files already completed in earlier runs."""
+    done = {}
+    if not os.path.exists(progress_path):
+        return done
+    with open(progress_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash
+            if record.get("status") == "done":
+                done[record["file"]] = record
+    return done
+
+
+def _is_done(path, done, store):
+    key = _file_key(path)
+    record = done.get(key["file"])
+    # A file edited since it was processed, or saved to the other store,
+    # counts as new (records from before --store were saved to SQLite)
+    return (record is not None and record["size"] == key["size"]
+            and record["mtime"] == key["mtime"] and record.get("store", "sqlite") == store)
+
+
+def _init_worker(mmap):
+    warm_up(mmap=mmap)
+
+
+def process_file(path, batch_size, db_path, store=None):
+    """Worker: ingest one statement and time it."""
+    record = _file_key(Path(path))
+    record["store"] = store_name(store)
+    start = time.perf_counter()
+    try:
+        counts = ingest_file(str(path), batch_size=batch_size, path=db_path, store=store)
+        record.update(status="done", **counts)
+    except Exception as e:
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run(directory, workers=None, batch_size=BATCH_SIZE, db_path=None,
+        progress_path=None, recursive=False, mmap=True, store=None):
+    """
+    Ingest the statements under `directory` not already done into `store`
+    (src.store; db_path defaults to the store's own location).
+    """
+    store = store_name(store)
+    progress_path = progress_path or os.path.join(directory, PROGRESS_FILE)
+    files = discover(directory, recursive)
+    done = load_progress(progress_path)
+    pending = [p for p in files if not _is_done(p, done, store)]
+
+    print(f"Found {len(files)} statements, {len(files) - len(pending)} already done, "
+          f"{len(pending)} to process.")
+    if not pending:
+        return {"files": 0, "failed": 0, "rows": 0, "seconds": 0.0}
+
+    # A worker initializer that raises only surfaces as BrokenProcessPool
+    warm_up(mmap=mmap)
+    db_path = init_store(store, db_path)
+    # Forked workers must open their own SQLite connections, not share ours
+    close_connections()
+
+    totals = {"files": 0, "failed": 0, "rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with open(progress_path, "a", encoding="utf-8") as progress, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(mmap,)
+    ) as pool:
+        futures = [pool.submit(process_file, str(p), batch_size, db_path, store) for p in pending]
+        for i, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            progress.write(json.dumps(record) + "\n")
+            progress.flush()
+
+            name = os.path.basename(record["file"])
+            if record["status"] == "done":
+                totals["files"] += 1
+                for key in ("rows", "inserted", "updated", "skipped"):
+                    totals[key] += record[key]
+                rate = record["rows"] / record["seconds"] if record["seconds"] else 0
+                print(f"[{i}/{len(pending)}] {name}: {record['rows']} rows in "
+                      f"{record['seconds']:.2f}s ({rate:,.0f} rows/s; "
+                      f"{record['inserted']} new, {record['skipped']} skipped)")
+            else:
+                totals["failed"] += 1
+                print(f"[{i}/{len(pending)}] {name}: FAILED after {record['seconds']:.2f}s "
+                      f"({record['error']})")
+
+    totals["seconds"] = round(time.perf_counter() - start, 3)
+    elapsed = totals["seconds"] or 1e-9
+    print(f"Processed {totals['files']} files ({totals['failed']} failed), "
+          f"{totals['rows']} rows in {totals['seconds']:.2f}s: "
+          f"{totals['rows'] / elapsed:,.0f} rows/s, {totals['files'] / elapsed:.2f} files/s. "
+          f"{totals['inserted']} inserted, {totals['updated']} updated, {totals['skipped']} skipped.")
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a directory of bank statements.")
+    parser.add_argument("directory", help="folder containing PDF, CSV or Excel statements")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per batch")
+    parser.add_argument("--store", choices=list(STORES), default=None,
+                        help="transaction store (default: $TAXBRIDGE_STORE, else sqlite)")
+    parser.add_argument("--db", default=None,
+                        help="SQLite database or Parquet store directory to write to "
+                             "(default: the store's own)")
+    parser.add_argument("--progress-file", default=None,
+                        help=f"resume log (default: <directory>/{PROGRESS_FILE})")
+    parser.add_argument("--recursive", action="store_true", help="include subfolders")
+    parser.add_argument("--no-mmap", action="store_true",
+                        help="load a private copy of a joblib model per worker "
+                             "instead of memory-mapping it")
+    args = parser.parse_args(argv)
+
+    try:
+        totals = run(
+            args.directory,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            db_path=args.db,
+            progress_path=args.progress_file,
+            recursive=args.recursive,
+            mmap=not args.no_mmap,
+            store=args.store,
+        )
+    except FileNotFoundError as e:
+        print("ERROR: no trained model found:", e)
+        return 1
+    except (ImportError, ValueError) as e:
+        # No pyarrow for --store parquet, or an unknown $TAXBRIDGE_STORE
+        print("ERROR:", e)
+        return 1
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
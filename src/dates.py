@@ -0,0 +1,137 @@
+"""
+Bank statement date parsing.
+
+Each statement prints its dates one way, so the format is detected once
+from a sample of distinct values and the whole column is then parsed with
+that exact format in one vectorized call. Values are factorized first, so
+a date repeated on every row of a day is converted once. Cells the
+detected format does not fit fall back to the generic rule: text starting
+with a 4-digit year (2024-04-01, 2024/04/01, 2024.04.01) is year-first,
+anything else day-first (as Indian statements print it).
+
+    fmt = detect_format(first_chunk["date"])
+    dates = parse_dates(chunk["date"], fmt)
+"""
+import numpy as np
+import pandas as pd
+
+# Candidate formats, tried in order; the one parsing most of the sample wins
+# (ties go to the earlier entry). Day- or year-first only: Indian statements
+# never print month-first dates.
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%y",
+    "%d-%m-%Y", "%d-%m-%y",
+    "%d.%m.%Y", "%d.%m.%y",
+    "%d-%b-%Y", "%d-%b-%y",
+    "%d %b %Y", "%d %b %y",
+    "%d/%b/%Y", "%d/%b/%y",
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d",
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M:%S",
+]
+
+# Excel stores dates as days since 1899-12-30; numbers in this range are
+# read as serials (1954-2119), so amounts or yyyymmdd ints are not.
+EXCEL_FORMAT = "excel"
+EXCEL_ORIGIN = "1899-12-30"
+EXCEL_SERIAL_RANGE = (20_000, 80_000)
+
+# Distinct values examined by detect_format
+DATE_SAMPLE = 200
+
+_SERIAL = r'^\d{5}(?:\.\d+)?$'
+
+
+def _distinct_text(values):
+    """Factorize stripped text: (codes, uniques); empty/NA cells get code -1."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    # Factorize the raw cells first so only distinct values are stringified
+    codes, uniques = pd.factorize(s)
+    uniques = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    blank = uniques.eq("").to_numpy()
+    if blank.any():
+        codes[np.isin(codes, np.flatnonzero(blank))] = -1
+    return codes, uniques
+
+
+def _is_serial(text):
+    numbers = pd.to_numeric(text.where(text.str.match(_SERIAL)), errors="coerce")
+    low, high = EXCEL_SERIAL_RANGE
+    return numbers.between(low, high).to_numpy()
+
+
+def _sample(uniques):
+    uniques = uniques[uniques.ne("")]
+    return uniques.iloc[:DATE_SAMPLE]
+
+
+def detect_format(values):
+    """
+    The format string (or EXCEL_FORMAT) that parses most of a sample of
+    distinct values, or None when nothing fits (leave it to the fallback).
+    """
+    if isinstance(values, pd.Series) and pd.api.types.is_datetime64_any_dtype(values):
+        return None
+    _, uniques = _distinct_text(values)
+    sample = _sample(uniques)
+    if sample.empty:
+        return None
+
+    best, best_count = None, 0
+    serials = int(_is_serial(sample).sum())
+    if serials:
+        best, best_count = EXCEL_FORMAT, serials
+    for fmt in DATE_FORMATS:
+        count = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+            if count == len(sample):
+                break
+    return best
+
+
+def _parse_text(text, fmt):
+    """Parse distinct strings with `fmt`, then the generic rule for the rest."""
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    if fmt == EXCEL_FORMAT:
+        serial = _is_serial(text)
+        if serial.any():
+            parsed[serial] = pd.to_datetime(
+                text[serial].astype(float), unit="D", origin=EXCEL_ORIGIN
+            ).astype("datetime64[ns]")
+    elif fmt:
+        parsed[:] = pd.to_datetime(text, format=fmt, errors="coerce").astype("datetime64[ns]")
+
+    # Bare numbers that are not serials (amounts, ids) are never dates
+    rest = parsed.isna() & text.ne("") & ~text.str.fullmatch(r'[\d.]+')
+    if rest.any():
+        iso = rest & text.str.match(r'^\d{4}[-/.]')
+        other = rest & ~iso
+        for mask, dayfirst in [(iso, False), (other, True)]:
+            if mask.any():
+                parsed[mask] = pd.to_datetime(
+                    text[mask], errors="coerce", dayfirst=dayfirst, format="mixed"
+                ).astype("datetime64[ns]")
+    return parsed
+
+
+def parse_dates(values, fmt=None):
+    """
+    datetime64 column from statement date cells (NaT when unparseable).
+    `fmt` is a detect_format result; detected from this column when None.
+    Datetime columns are returned as is, and numeric columns read as Excel
+    serials, so a column is only ever parsed once per pipeline.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        fmt = EXCEL_FORMAT
+
+    codes, uniques = _distinct_text(s)
+    if fmt is None:
+        fmt = detect_format(uniques)
+    parsed = _parse_text(uniques, fmt)
+
+    # Empty/NA cells have code -1, which picks the trailing NaT below
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))
+    return pd.Series(lookup[codes], index=s.index)
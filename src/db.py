@@ -1,13 +1,54 @@
+import hashlib
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from src import instrument
+from src.dates import parse_dates
+from src.preprocess import clean_text_series, parse_amounts
 
 DB_PATH = "taxbridge.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
+# Applied to every connection. WAL lets readers run alongside a writer and
+# busy_timeout makes concurrent uploads wait for the lock instead of failing
+# with "database is locked".
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -64000",
+    "PRAGMA busy_timeout = 30000",
+]
+
+# Rows per executemany call; bounds the tuples held in memory at once
+INSERT_BATCH = 50_000
+
+# Loads at least this large that also outnumber the rows already stored drop
+# and rebuild the secondary indexes, which is cheaper than updating them row
+# by row (first import of a long history, benchmarks).
+BULK_LOAD_MIN_ROWS = 100_000
+
+TRANSACTION_COLUMNS = [
+    "date", "description", "amount", "predicted_category", "deductible", "gst_rate", "gst_input",
+]
+
+# Columns a re-ingested row may change; everything else is part of its fingerprint
+UPSERT_COLUMNS = ["predicted_category", "deductible", "gst_rate", "gst_input"]
+
+_local = threading.local()
+
+
+# ----------------------------
+# Schema migrations
+# ----------------------------
+# Each migration runs once, in order, inside a write transaction; the number
+# applied so far is stored in PRAGMA user_version. Append only.
+
+def _migration_1(conn):
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS transactions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         date TEXT,
@@ -17,19 +58,377 @@ def init_db():
         deductible INTEGER
     )
     ''')
-    conn.commit()
-    conn.close()
 
-def save_transactions(df: pd.DataFrame):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
+INDEXES = {
+    "idx_transactions_date": "transactions(date)",
+    "idx_transactions_category": "transactions(predicted_category)",
+}
+
+def create_indexes(conn):
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+def drop_indexes(conn):
+    for name in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+def _migration_2(conn):
+    create_indexes(conn)
+
+def _add_column(conn, table, column):
+    """ALTER TABLE ... ADD COLUMN, skipped when the column already exists."""
+    name = column.split()[0]
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if name not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+def _migration_3(conn):
+    # Natural key for idempotent ingestion; rows saved before this migration
+    # are fingerprinted in place so re-uploading old statements is a no-op.
+    _add_column(conn, "transactions", "fingerprint TEXT")
+    existing = pd.read_sql_query("SELECT id, date, description, amount FROM transactions", conn)
+    if not existing.empty:
+        conn.executemany(
+            "UPDATE transactions SET fingerprint = ? WHERE id = ?",
+            zip(transaction_fingerprints(existing), existing["id"].tolist()),
+        )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint "
+        "ON transactions(fingerprint)"
+    )
+
+# One row per (month, category, gst_rate). Inserts are folded in by
+# save_transactions; changes to stored rows by the trigger below.
+ROLLUP_KEY = (
+    "COALESCE({t}month, ''), COALESCE({t}predicted_category, ''), COALESCE({t}gst_rate, 0)"
+)
+ROLLUP_MERGE = (
+    "ON CONFLICT(month, category, gst_rate) DO UPDATE SET "
+    "txn_count = txn_count + excluded.txn_count, "
+    "amount = amount + excluded.amount, "
+    "gst_input = gst_input + excluded.gst_input, "
+    "deductible_count = deductible_count + excluded.deductible_count"
+)
+
+def _rollup_delta(row, sign):
+    return (
+        f"INSERT INTO monthly_rollup VALUES ({ROLLUP_KEY.format(t=row + '.')}, "
+        f"{sign}1, {sign}COALESCE({row}.amount, 0), {sign}COALESCE({row}.gst_input, 0), "
+        f"{sign}COALESCE({row}.deductible, 0)) {ROLLUP_MERGE};"
+    )
+
+def _migration_4(conn):
+    for column in ["gst_rate INTEGER", "gst_input REAL", "month TEXT"]:
+        _add_column(conn, "transactions", column)
+
+    existing = pd.read_sql_query("SELECT id, date FROM transactions", conn)
+    if not existing.empty:
+        conn.executemany(
+            "UPDATE transactions SET month = ? WHERE id = ?",
+            zip(month_keys(existing["date"]), existing["id"].tolist()),
+        )
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS monthly_rollup (
+        month TEXT NOT NULL,
+        category TEXT NOT NULL,
+        gst_rate INTEGER NOT NULL,
+        txn_count INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        gst_input REAL NOT NULL,
+        deductible_count INTEGER NOT NULL,
+        PRIMARY KEY (month, category, gst_rate)
+    ) WITHOUT ROWID
+    ''')
+    rebuild_rollups(conn)
+
+    # Upserts that change a stored row move it between rollup buckets
+    conn.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup
+    AFTER UPDATE OF month, predicted_category, gst_rate, amount, gst_input, deductible
+    ON transactions
+    BEGIN
+        {_rollup_delta("OLD", "-")}
+        {_rollup_delta("NEW", "")}
+        DELETE FROM monthly_rollup WHERE txn_count = 0;
+    END
+    ''')
+
+def _migration_5(conn):
+    # Fingerprints now key on the parsed date rather than its text; re-key
+    # stored rows so re-uploading old statements stays a no-op. Clearing
+    # first avoids transient clashes with the unique index.
+    existing = pd.read_sql_query(
+        "SELECT id, date, description, amount FROM transactions ORDER BY id", conn
+    )
+    if not existing.empty:
+        conn.execute("UPDATE transactions SET fingerprint = NULL")
+        conn.executemany(
+            "UPDATE transactions SET fingerprint = ? WHERE id = ?",
+            zip(transaction_fingerprints(existing), existing["id"].tolist()),
+        )
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4, _migration_5]
+
+
+@contextmanager
+def write_transaction(conn):
+    """
+    BEGIN IMMEDIATE ... COMMIT (or ROLLBACK on error). Taking the write lock
+    up front avoids lock-upgrade deadlocks between concurrent writers.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def migrate(conn):
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with write_transaction(conn):
+            # Another connection may have migrated since the read above;
+            # re-check under the write lock so each step runs exactly once.
+            (applied,) = conn.execute("PRAGMA user_version").fetchone()
+            if applied >= number:
+                continue
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+def connect(path=DB_PATH):
+    """Open a new tuned connection (autocommit mode; use write_transaction)."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    migrate(conn)
+    return conn
+
+def get_connection(path=DB_PATH):
+    """Return this thread's reusable connection to `path`, opening it on first use."""
+    conns = _local.__dict__.setdefault("conns", {})
+    conn = conns.get(str(path))
+    if conn is None:
+        conn = conns[str(path)] = connect(path)
+    return conn
+
+def close_connections():
+    """Close the connections opened by the current thread."""
+    for conn in _local.__dict__.pop("conns", {}).values():
+        conn.close()
+
+def _fold_into_rollups(conn, after_id=0):
+    """Add transactions with id > after_id to monthly_rollup (set-based)."""
+    key = ROLLUP_KEY.format(t="")
+    conn.execute(
+        f"INSERT INTO monthly_rollup "
+        f"SELECT {key}, COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(gst_input), 0), "
+        f"COALESCE(SUM(deductible), 0) "
+        f"FROM transactions WHERE id > ? GROUP BY 1, 2, 3 {ROLLUP_MERGE}",
+        (after_id,),
+    )
+
+def rebuild_rollups(conn):
+    """Recompute monthly_rollup from scratch (repair / migration)."""
+    conn.execute("DELETE FROM monthly_rollup")
+    _fold_into_rollups(conn)
+
+def init_db(path=DB_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    get_connection(path)
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+
+def _datetime_strings(s):
+    """Format datetimes like DataFrame.to_sql does, once per distinct value."""
+    codes, uniques = pd.factorize(s)
+    text = np.append(uniques.strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object), None)
+    return text[codes].tolist()  # NaT has code -1 -> None
+
+def _sql_values(df):
+    """Convert columns to plain Python values sqlite3 can bind (NaN -> NULL)."""
+    out = []
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            out.append(_datetime_strings(s))
+        else:
+            out.append(s.astype(object).where(s.notna(), None).tolist())
+    return zip(*out)
+
+def month_keys(s):
+    """'YYYY-MM' per date ('' when unknown), formatting each distinct value once."""
+    codes, uniques = pd.factorize(parse_dates(s))
+    months = uniques.strftime("%Y-%m").to_numpy(dtype=object)
+    return np.append(months, "")[codes].tolist()
+
+def _date_keys(s):
+    """
+    Dates as fingerprinted and stored: to_sql-style text for anything that
+    parses as a date (so "25/01/2024" and "2024-01-25" are the same day),
+    else the stripped text.
+    """
+    text = pd.Series(_datetime_strings(parse_dates(s)), index=s.index, dtype=object)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return text.fillna("")
+    return text.fillna(s.astype(object).where(s.notna(), "").astype(str).str.strip())
+
+def transaction_fingerprints(df, seen=None):
+    """
+    Stable id per transaction: SHA-1 of normalized date, amount (in paise) and
+    cleaned description, plus an occurrence ordinal so genuine repeats on
+    the same day (two identical fares) stay distinct.
+
+    `seen` maps key -> occurrences already fingerprinted; pass the same dict
+    for every chunk of one statement so ordinals continue across chunks.
+    """
+    missing = pd.Series(None, index=df.index, dtype=object)
+    date = df.get("date", missing)
+    amount = df.get("amount", missing)
+    desc = df.get("clean_desc")
+    if desc is None:
+        desc = clean_text_series(df.get("description", missing))
+
+    paise = parse_amounts(amount).replace([np.inf, -np.inf], 0.0)
+    paise = (paise * 100).round().astype("int64").astype(str)
+    keys = _date_keys(date) + "|" + paise + "|" + desc.astype(str)
+
+    ordinal = keys.groupby(keys, sort=False).cumcount()
+    if seen is not None:
+        ordinal += keys.map(seen).fillna(0).astype(int)
+        for key, count in keys.value_counts(sort=False).items():
+            seen[key] = seen.get(key, 0) + count
+
+    full = (keys + "|" + ordinal.astype(str)).tolist()
+    return [hashlib.sha1(k.encode("utf-8")).hexdigest() for k in full]
+
+@instrument.stage()
+def save_transactions(df: pd.DataFrame, path=DB_PATH, seen=None):
+    """
+    Idempotently ingest classified transactions. Rows whose fingerprint is
+    already stored are skipped, or updated if their category/deductible/GST
+    changed. monthly_rollup is kept in step in the same transaction.
+    Returns {"inserted", "updated", "skipped"} counts.
+    """
+    init_db(path)
+    conn = get_connection(path)
 
     # Make sure the columns exist before saving
-    required_cols = ["date", "description", "amount", "predicted_category", "deductible"]
-    for col in required_cols:
-        if col not in df.columns:
-            df[col] = None
-
-    df_to_save = df[required_cols].copy()
-    df_to_save.to_sql('transactions', conn, if_exists='append', index=False)
-    conn.close()
+    df_to_save = df.reindex(columns=TRANSACTION_COLUMNS)
+    df_to_save["fingerprint"] = transaction_fingerprints(df, seen)
+    df_to_save["month"] = month_keys(df_to_save["date"])
+
+    columns = TRANSACTION_COLUMNS + ["fingerprint", "month"]
+    changed = " OR ".join(f"{c} IS NOT excluded.{c}" for c in UPSERT_COLUMNS)
+    sql = (
+        f"INSERT INTO transactions ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT(fingerprint) DO UPDATE SET "
+        f"{', '.join(f'{c} = excluded.{c}' for c in UPSERT_COLUMNS)} "
+        f"WHERE {changed}"
+    )
+
+    with write_transaction(conn):
+        (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()
+        bulk = len(df_to_save) >= BULK_LOAD_MIN_ROWS and len(df_to_save) > last_id
+        if bulk:
+            drop_indexes(conn)
+
+        changes = 0
+        for start in range(0, len(df_to_save), INSERT_BATCH):
+            batch = df_to_save.iloc[start:start + INSERT_BATCH]
+            changes += conn.executemany(sql, _sql_values(batch)).rowcount
+
+        if bulk:
+            create_indexes(conn)
+
+        # Updated rows were moved between buckets by the trigger; add new ones
+        _fold_into_rollups(conn, after_id=last_id)
+
+        # AUTOINCREMENT ids only grow, so new rows are exactly those past last_id;
+        # every other change was an upsert update.
+        (inserted,) = conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE id > ?", (last_id,)
+        ).fetchone()
+
+    return {
+        "inserted": inserted,
+        "updated": changes - inserted,
+        "skipped": len(df_to_save) - changes,
+    }
+
+def save_transaction_chunks(chunks, path=DB_PATH, on_chunk=None):
+    """
+    Save an iterable of DataFrame chunks (e.g. classify_chunks output) one
+    at a time, so the whole statement never has to be held in memory.
+    on_chunk(chunk, counts) is called after each chunk is saved.
+    Returns the summed {"rows", "inserted", "updated", "skipped"} counts.
+    """
+    totals = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    seen = {}
+    for chunk in chunks:
+        counts = save_transactions(chunk, path, seen=seen)
+        totals["rows"] += len(chunk)
+        for key, count in counts.items():
+            totals[key] += count
+        if on_chunk:
+            on_chunk(chunk, counts)
+    return totals
+
+
+# ----------------------------
+# Summaries (served from monthly_rollup, not the transactions table)
+# ----------------------------
+
+SUMMARY_COLUMNS = '''
+    SUM(txn_count) AS txn_count,
+    SUM(amount) AS total_spend,
+    SUM(gst_input) AS gst_input,
+    SUM(CASE WHEN gst_rate > 0 THEN amount ELSE 0 END) AS taxable_spend,
+    SUM(CASE WHEN gst_rate > 0 THEN txn_count ELSE 0 END) AS gst_applicable,
+    SUM(CASE WHEN gst_rate = 0 THEN txn_count ELSE 0 END) AS gst_not_applicable,
+    SUM(deductible_count) AS deductible_count
+'''
+
+def _summary(group_by, start_month, end_month, path):
+    """Aggregate rollup rows in [start_month, end_month] ('YYYY-MM', inclusive)."""
+    clauses, params = [], []
+    if start_month:
+        clauses.append("month >= ?")
+        params.append(start_month)
+    if end_month:
+        clauses.append("month <= ?")
+        params.append(end_month)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    select = f"{group_by}, {SUMMARY_COLUMNS}" if group_by else SUMMARY_COLUMNS
+    sql = f"SELECT {select} FROM monthly_rollup {where}"
+    if group_by:
+        sql += f" GROUP BY {group_by} ORDER BY {group_by}"
+
+    init_db(path)
+    return pd.read_sql_query(sql, get_connection(path), params=params)
+
+def monthly_summary(start_month=None, end_month=None, path=DB_PATH):
+    """Spend, GST input and counts per month (the dashboard trend)."""
+    return _summary("month", start_month, end_month, path)
+
+def category_summary(start_month=None, end_month=None, path=DB_PATH):
+    """Spend, GST input and counts per predicted category."""
+    return _summary("category", start_month, end_month, path)
+
+def gst_summary(start_month=None, end_month=None, path=DB_PATH):
+    """
+    Spend and GST input per GST rate, e.g. a financial-year summary with
+    gst_summary("2024-04", "2025-03").
+    """
+    return _summary("gst_rate", start_month, end_month, path)
+
+def summary_totals(start_month=None, end_month=None, path=DB_PATH):
+    """Headline numbers for the dashboard cards, as a dict."""
+    row = _summary(None, start_month, end_month, path).to_dict("records")[0]
+    return {k: (0 if pd.isna(v) else v) for k, v in row.items()}
@@ -0,0 +1,110 @@
+import os
+import tempfile
+
+import pandas as pd
+from src.db import DB_PATH, get_connection, init_db
+
+# Rows serialized per step; bounds what is held in memory besides the source
+EXPORT_CHUNK_ROWS = 50_000
+
+
+def _chunks(source, chunk_rows):
+    """Yield DataFrame chunks from a DataFrame or any iterable of DataFrames."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+        if source.empty:
+            yield source
+    else:
+        yield from source
+
+
+def query_chunks(sql, params=(), path=DB_PATH, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream the result of a SQL query against taxbridge.db as DataFrame chunks."""
+    init_db(path)
+    yield from pd.read_sql_query(sql, get_connection(path), params=params, chunksize=chunk_rows)
+
+
+def write_csv(source, file_path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write a DataFrame or chunk iterable to CSV, one chunk at a time."""
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        header = True
+        for chunk in _chunks(source, chunk_rows):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+    return file_path
+
+
+def _cell_values(chunk):
+    """Column values as Python objects openpyxl can write (NaN/NaT -> empty)."""
+    columns = []
+    for col in chunk.columns:
+        s = chunk[col]
+        values = s.astype(object).where(s.notna(), None)
+        columns.append(values.tolist())
+    return zip(*columns)
+
+
+def write_xlsx(source, file_path, chunk_rows=EXPORT_CHUNK_ROWS, sheet_title="Transactions"):
+    """
+    Write a DataFrame or chunk iterable to XLSX with openpyxl's write-only
+    mode, which streams rows to disk instead of building the sheet in memory.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+
+    header = True
+    for chunk in _chunks(source, chunk_rows):
+        if header:
+            ws.append([str(c) for c in chunk.columns])
+            header = False
+        for row in _cell_values(chunk):
+            ws.append(row)
+
+    wb.save(file_path)
+    return file_path
+
+
+WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+}
+
+
+def export_file(source, fmt, file_path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export to `file_path` as "csv" or "xlsx"; a partly written file is removed on error."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    try:
+        WRITERS[fmt](source, file_path, chunk_rows=chunk_rows)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return file_path
+
+
+def export_to_tempfile(source, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Export to a new temporary .csv/.xlsx file and return its path.
+    The caller owns the file and should delete it when done.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    fd, file_path = tempfile.mkstemp(prefix="taxbridge_", suffix=f".{fmt}")
+    os.close(fd)
+    return export_file(source, fmt, file_path, chunk_rows=chunk_rows)
+
+
+def export_transactions(file_path, fmt="csv", path=DB_PATH, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export the stored transactions straight from SQLite, chunk by chunk."""
+    sql = (
+        "SELECT date, description, amount, predicted_category, deductible, gst_rate, gst_input "
+        "FROM transactions ORDER BY id"
+    )
+    return WRITERS[fmt](query_chunks(sql, path=path, chunk_rows=chunk_rows), file_path,
+                        chunk_rows=chunk_rows)
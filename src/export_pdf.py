@@ -1,12 +1,188 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
 from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from src import instrument
+from src.db import month_keys
+
+# Rows per detail block, about one A4 page. Each chunk is its own flowable
+# with its own header, so layout cost grows linearly with the row count.
+DETAIL_CHUNK_ROWS = 40
+
+DETAIL_HEADER = ["Date", "Description", "Amount", "Category", "GST %", "GST Input", "Deductible"]
+DETAIL_COL_WIDTHS = [70, 160, 60, 75, 50, 70, 60]
+DETAIL_ROW_HEIGHT = 18
+DETAIL_FONT_SIZE = 10
+DETAIL_PADDING = 6
+
+
+# ReportLab is imported on first report, not when this module is imported;
+# the summary style and the DetailChunk class are built then and reused.
+@lru_cache(maxsize=None)
+def _summary_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#E8EEF9")),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 12),
+        ('BOTTOMPADDING', (0,0), (-1,0), 10),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey)
+    ])
+
+
+def _summary_table(df):
+    total_exp = df["amount"].sum()
+    total_gst = df["gst_input"].sum()
+    total_deductible = df["deductible"].sum()
+
+    summary_data = [
+        ["Total Expense", f"₹ {total_exp:,.2f}"],
+        ["GST Input Credit", f"₹ {total_gst:,.2f}"],
+        ["Deductible Transactions", str(total_deductible)]
+    ]
+
+    from reportlab.platypus import Table
+
+    summary_table = Table(summary_data, colWidths=[180, 180])
+    summary_table.setStyle(_summary_style())
+    return summary_table
+
+
+def _detail_columns(df):
+    """
+    The detail cells of `df` as strings, one list per column. Called on one
+    page of rows at a time, where plain Python is cheaper than pandas'
+    per-call overhead; the strings match the column-wide astype(str).
+    """
+    date = df["date"]
+    if pd.api.types.is_datetime64_any_dtype(date):
+        dates = np.datetime_as_string(date.to_numpy(dtype="datetime64[D]"), unit="D").tolist()
+        dates = ["" if d == "NaT" else d for d in dates]
+    else:
+        dates = [str(d) for d in date.tolist()]
+    return [
+        dates,
+        [str(d) for d in df["description"].tolist()],
+        [f"₹ {a}" for a in df["amount"].tolist()],
+        [str(c).capitalize() for c in df["predicted_category"].tolist()],
+        [str(r) for r in df["gst_rate"].tolist()],
+        [f"₹ {g}" for g in df["gst_input"].tolist()],
+        ["Yes" if d == 1 else "No" for d in df["deductible"].tolist()],
+    ]
+
+
+@lru_cache(maxsize=None)
+def _detail_chunk_class():
+    """DetailChunk subclasses a ReportLab Flowable, so it is defined on first use."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Flowable
+
+    class DetailChunk(Flowable):
+        """
+        Rows [start, stop) of the detail table under a header. It keeps
+        only a reference to the frame: when the rows do not fit, split()
+        hands the frame one page-sized block (at most chunk_rows rows) and
+        a DetailChunk for the rest, and a block's cells are formatted only
+        when it is drawn. Memory therefore stays flat however long the
+        report is. Each column is drawn as one text block rather than cell
+        by cell as a ReportLab Table would, which is where a Table spends
+        most of its time.
+        """
+
+        def __init__(self, df, start, stop, chunk_rows):
+            Flowable.__init__(self)
+            self.df, self.start, self.stop = df, start, stop
+            self.chunk_rows = chunk_rows
+            self.hAlign = "CENTER"  # like the Table it replaces
+            self.width = sum(DETAIL_COL_WIDTHS)
+            self.height = (stop - start + 1) * DETAIL_ROW_HEIGHT
+
+        def wrap(self, availWidth, availHeight):
+            if self.stop - self.start > self.chunk_rows:
+                # Never drawn whole; report it as too tall so the frame splits it
+                return self.width, max(self.height, availHeight + 1)
+            return self.width, self.height
+
+        def split(self, availWidth, availHeight):
+            fit = int(availHeight // DETAIL_ROW_HEIGHT) - 1  # rows below the header
+            if fit < 1:
+                return []
+            middle = self.start + min(fit, self.chunk_rows)
+            if middle >= self.stop:
+                return [self]
+            return [
+                DetailChunk(self.df, self.start, middle, self.chunk_rows),
+                DetailChunk(self.df, middle, self.stop, self.chunk_rows),
+            ]
+
+        def draw(self):
+            canvas = self.canv
+            columns = _detail_columns(self.df.iloc[self.start:self.stop])
+            lefts = np.cumsum([0] + DETAIL_COL_WIDTHS[:-1]).tolist()
+            # Text baseline within a row, roughly centring 10pt Helvetica
+            baseline = (DETAIL_ROW_HEIGHT - DETAIL_FONT_SIZE) / 2 + 1.5
+
+            canvas.saveState()
+            canvas.setFillColor(colors.HexColor("#E3F2FD"))
+            canvas.rect(0, self.height - DETAIL_ROW_HEIGHT, self.width, DETAIL_ROW_HEIGHT,
+                        stroke=0, fill=1)
+
+            grid = canvas.beginPath()
+            for x in lefts + [self.width]:
+                grid.moveTo(x, 0)
+                grid.lineTo(x, self.height)
+            for y in range(0, int(self.height) + 1, DETAIL_ROW_HEIGHT):
+                grid.moveTo(0, y)
+                grid.lineTo(self.width, y)
+            canvas.setStrokeColor(colors.grey)
+            canvas.setLineWidth(0.5)
+            canvas.drawPath(grid, stroke=1, fill=0)
+
+            canvas.setFillColor(colors.black)
+            top = self.height - DETAIL_ROW_HEIGHT + baseline
+            for left, width, name, values in zip(lefts, DETAIL_COL_WIDTHS, DETAIL_HEADER, columns):
+                # Clip to the column so long narrations do not run into the next one
+                canvas.saveState()
+                cell = canvas.beginPath()
+                cell.rect(left, 0, width, self.height)
+                canvas.clipPath(cell, stroke=0, fill=0)
+                text = canvas.beginText(left + DETAIL_PADDING, top)
+                text.setFont("Helvetica-Bold", DETAIL_FONT_SIZE, DETAIL_ROW_HEIGHT)
+                text.textLine(name)
+                text.setFont("Helvetica", DETAIL_FONT_SIZE, DETAIL_ROW_HEIGHT)
+                text.textLines(values, trim=0)
+                canvas.drawText(text)
+                canvas.restoreState()
+            canvas.restoreState()
+
+    return DetailChunk
+
+
+def _detail_table(df, chunk_rows):
+    """The detail section; it is split into page blocks with repeated headers as it is laid out."""
+    return _detail_chunk_class()(df, 0, len(df), chunk_rows)
+
+
+@instrument.stage()
+def generate_pdf_report(df, file_path="taxbridge_report.pdf", summary_only=False,
+                        by_month=False, chunk_rows=DETAIL_CHUNK_ROWS):
+    """
+    Write the expense report PDF. by_month splits the detail into one section
+    (heading, summary, detail) per statement month; summary_only leaves out
+    the transaction detail.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
 
-def generate_pdf_report(df, file_path="taxbridge_report.pdf"):
     styles = getSampleStyleSheet()
     title_style = styles["Heading1"]
+    section_style = styles["Heading2"]
     normal_style = styles["Normal"]
 
     doc = SimpleDocTemplate(
@@ -34,57 +210,23 @@ def generate_pdf_report(df, file_path="taxbridge_report.pdf"):
     # ----------------------------
     # Summary Numbers
     # ----------------------------
-    total_exp = df["amount"].sum()
-    total_gst = df["gst_input"].sum()
-    total_deductible = df["deductible"].sum()
-
-    summary_data = [
-        ["Total Expense", f"₹ {total_exp:,.2f}"],
-        ["GST Input Credit", f"₹ {total_gst:,.2f}"],
-        ["Deductible Transactions", str(total_deductible)]
-    ]
-
-    summary_table = Table(summary_data, colWidths=[180, 180])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#E8EEF9")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 12),
-        ('BOTTOMPADDING', (0,0), (-1,0), 10),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey)
-    ]))
-
-    elements.append(summary_table)
+    elements.append(_summary_table(df))
     elements.append(Spacer(1, 20))
 
     # ----------------------------
-    # Detailed table
+    # Detailed tables
     # ----------------------------
-    table_data = [
-        ["Date", "Description", "Amount", "Category", "GST %", "GST Input", "Deductible"]
-    ]
-
-    for _, row in df.iterrows():
-        table_data.append([
-            row["date"],
-            row["description"],
-            f"₹ {row['amount']}",
-            row["predicted_category"].capitalize(),
-            str(row["gst_rate"]),
-            f"₹ {row['gst_input']}",
-            "Yes" if row["deductible"] == 1 else "No"
-        ])
-
-    detail_table = Table(table_data, colWidths=[70, 160, 60, 75, 50, 70, 60])
-    detail_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#E3F2FD")),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('ALIGN', (2,1), (-1,-1), 'CENTER'),
-    ]))
-
-    elements.append(detail_table)
+    if by_month:
+        months = pd.Series(month_keys(df["date"]), index=df.index)
+        for month, section in df.groupby(months, sort=True):
+            elements.append(Paragraph(month or "Undated", section_style))
+            elements.append(_summary_table(section))
+            elements.append(Spacer(1, 12))
+            if not summary_only:
+                elements.append(_detail_table(section, chunk_rows))
+                elements.append(Spacer(1, 20))
+    elif not summary_only:
+        elements.append(_detail_table(df, chunk_rows))
 
     # Build the PDF
     doc.build(elements)
@@ -0,0 +1,131 @@
+"""
+NumPy-only inference for the TF-IDF + LogisticRegression pipeline.
+
+train_model exports the fitted vocabulary, IDF weights and float32
+coefficients to models/model.npz. Loading that needs neither scikit-learn,
+scipy nor joblib, which keeps cold start short for batch workers.
+"""
+import re
+
+import numpy as np
+
+# Bumped when the .npz layout changes
+ARTIFACT_VERSION = 1
+
+
+def export_artifact(pipeline, path):
+    """Write the inference weights of a fitted TF-IDF + LR pipeline to `path`."""
+    vectorizer, clf = pipeline[0], pipeline[-1]
+    if not hasattr(vectorizer, "vocabulary_") or not hasattr(vectorizer, "idf_"):
+        raise ValueError("Only TF-IDF pipelines can be compiled; hashing models keep the joblib file.")
+    if vectorizer.analyzer != "word" or vectorizer.tokenizer or vectorizer.preprocessor \
+            or vectorizer.stop_words or vectorizer.strip_accents:
+        raise ValueError("Only the default word analyzer can be compiled.")
+
+    vocab = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, column in vectorizer.vocabulary_.items():
+        vocab[column] = term
+
+    np.savez_compressed(
+        path,
+        version=np.array(ARTIFACT_VERSION),
+        vocab=vocab.astype(str),
+        idf=vectorizer.idf_.astype(np.float64),
+        coef=clf.coef_.astype(np.float32),
+        intercept=clf.intercept_.astype(np.float64),
+        classes=np.asarray(clf.classes_).astype(str),
+        token_pattern=np.array(vectorizer.token_pattern),
+        lowercase=np.array(vectorizer.lowercase),
+        ngram_range=np.array(vectorizer.ngram_range),
+        binary=np.array(vectorizer.binary),
+        sublinear_tf=np.array(vectorizer.sublinear_tf),
+        norm=np.array(vectorizer.norm or ""),
+    )
+    return path
+
+
+class CompiledModel:
+    """Drop-in for the fitted Pipeline's predict/predict_proba on text."""
+
+    def __init__(self, arrays):
+        if int(arrays["version"]) != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported model artifact version {int(arrays['version'])}")
+        self.vocabulary = {term: i for i, term in enumerate(arrays["vocab"].tolist())}
+        self.idf = arrays["idf"]
+        self.coef_t = np.ascontiguousarray(arrays["coef"].T)  # (terms, classes)
+        self.intercept = arrays["intercept"]
+        self.classes_ = arrays["classes"].astype(object)
+        self.token_re = re.compile(str(arrays["token_pattern"]))
+        self.lowercase = bool(arrays["lowercase"])
+        self.ngram_range = tuple(int(n) for n in arrays["ngram_range"])
+        self.binary = bool(arrays["binary"])
+        self.sublinear_tf = bool(arrays["sublinear_tf"])
+        self.norm = str(arrays["norm"]) or None
+
+    def _terms(self, doc):
+        tokens = self.token_re.findall(doc.lower() if self.lowercase else doc)
+        low, high = self.ngram_range
+        if high == 1:
+            return tokens
+        grams = tokens if low == 1 else []
+        for n in range(max(low, 2), high + 1):
+            grams += [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        return grams
+
+    def decision_function(self, docs):
+        docs = list(docs)
+        rows, cols, counts = [], [], []
+        for row, doc in enumerate(docs):
+            tf = {}
+            for term in self._terms(doc):
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    tf[column] = tf.get(column, 0) + 1
+            rows.extend([row] * len(tf))
+            cols.extend(tf.keys())
+            counts.extend(tf.values())
+
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        values = np.asarray(counts, dtype=np.float64)
+        if self.binary:
+            values[:] = 1.0
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[cols]
+
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(docs)))
+        elif self.norm == "l1":
+            norms = np.bincount(rows, weights=np.abs(values), minlength=len(docs))
+        else:
+            norms = np.ones(len(docs))
+        norms[norms == 0] = 1.0
+        values /= norms[rows]
+
+        contrib = values[:, None] * self.coef_t[cols]
+        scores = np.empty((len(docs), self.coef_t.shape[1]))
+        for k in range(scores.shape[1]):
+            scores[:, k] = np.bincount(rows, weights=contrib[:, k], minlength=len(docs))
+        scores += self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, docs):
+        scores = self.decision_function(docs)
+        if scores.ndim == 1:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1.0 - p, p])
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, docs):
+        scores = self.decision_function(docs)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def load_model(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        return CompiledModel(arrays)
@@ -0,0 +1,246 @@
+"""
+Per-stage timing and memory instrumentation.
+
+Pipeline entry points are wrapped with @stage, and chunk streams with
+stream(). Nothing is recorded until a sink is enabled, and a disabled stage
+costs one lookup per call. enable() records the whole process (CLIs,
+benchmarks); recording() and use() scope sinks to the current context, so
+concurrent app sessions each see only their own stages:
+
+    from src import instrument
+    panel = instrument.MemorySink()
+    instrument.enable(instrument.LoggingSink(), panel, memory=True)
+
+    with instrument.recording(panel):
+        classify_dataframe(df)
+
+Each record is a plain dict: stage, wall_s, cpu_s, rows, peak_mb (None
+unless memory=True), depth (nesting level), error (exception name or None)
+and ts (epoch seconds at the end of the stage).
+"""
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+_sinks = []  # process-wide, set by enable()
+_memory = False
+_started_tracemalloc = False
+_local = threading.local()  # per-thread stack of open stages
+
+# Sinks for the current context; None falls back to the process-wide ones.
+# Threads start with an empty context, so work handed to a pool records to
+# the submitter's sinks only when run in a copy of its context.
+_context_sinks = contextvars.ContextVar("instrument_sinks", default=None)
+
+
+# ----------------------------
+# Sinks
+# ----------------------------
+class LoggingSink:
+    """Write one log line per stage."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("taxbridge.instrument")
+        self.level = level
+
+    def __call__(self, record):
+        peak = "" if record["peak_mb"] is None else f" peak={record['peak_mb']:.1f}MB"
+        error = f" error={record['error']}" if record["error"] else ""
+        self.logger.log(
+            self.level, "%s%s wall=%.3fs cpu=%.3fs rows=%s%s%s",
+            "  " * record["depth"], record["stage"], record["wall_s"], record["cpu_s"],
+            record["rows"], peak, error,
+        )
+
+
+class JsonlSink:
+    """Append one JSON object per stage to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class MemorySink:
+    """Keep the most recent records in memory (e.g. for a Streamlit panel)."""
+
+    def __init__(self, maxlen=1000):
+        self.records = deque(maxlen=maxlen)
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+
+# ----------------------------
+# Switches
+# ----------------------------
+def enable(*sinks, memory=False):
+    """
+    Start recording the whole process to `sinks`. memory=True also tracks
+    the peak traced allocation of each stage via tracemalloc, which slows
+    Python-heavy code. tracemalloc is process-wide, so memory is only
+    measured for these sinks, never for context-scoped ones.
+    """
+    global _memory, _started_tracemalloc
+    _sinks[:] = sinks
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    global _memory, _started_tracemalloc
+    _sinks.clear()
+    _memory = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def enabled():
+    return bool(_active_sinks())
+
+
+def use(*sinks):
+    """
+    Record stages run in the current context to `sinks` instead of the
+    process-wide ones (none: record nothing here). For code that cannot
+    wrap its work in a block, e.g. a Streamlit script run.
+    """
+    return _context_sinks.set(list(sinks))
+
+
+@contextmanager
+def recording(*sinks):
+    """Record the stages run inside the block (in this context) to `sinks`."""
+    token = use(*sinks)
+    try:
+        yield
+    finally:
+        _context_sinks.reset(token)
+
+
+def _active_sinks():
+    sinks = _context_sinks.get()
+    return _sinks if sinks is None else sinks
+
+
+# ----------------------------
+# Measurement
+# ----------------------------
+def _emit(sinks, record):
+    for sink in list(sinks):
+        try:
+            sink(record)
+        except Exception:
+            logging.getLogger("taxbridge.instrument").exception("instrumentation sink failed")
+
+
+@contextmanager
+def measure(name, rows=None):
+    """
+    Record the enclosed block as stage `name`. Yields the record dict, so
+    the block can fill in rows once it knows them (or set "discard" to
+    drop the record).
+    """
+    sinks = _active_sinks()
+    if not sinks:
+        yield {}
+        return
+
+    stack = _local.__dict__.setdefault("stack", [])
+    record = {"stage": name, "rows": rows, "depth": len(stack), "error": None}
+    frame = {"peak": 0, "base": 0}
+    memory = _memory and sinks is _sinks and tracemalloc.is_tracing()
+    if memory:
+        frame["base"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    stack.append(frame)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall, 6)
+        record["cpu_s"] = round(time.process_time() - cpu, 6)
+        stack.pop()
+        record["peak_mb"] = None
+        if memory:
+            # A nested stage resets the tracemalloc peak, so fold the
+            # child's absolute peak back into its parent's frame.
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            record["peak_mb"] = round((peak - frame["base"]) / 1e6, 3)
+        record["ts"] = time.time()
+        if not record.pop("discard", False):
+            _emit(sinks, record)
+
+
+def _count_rows(args, result):
+    for value in (result, args[0] if args else None):
+        if hasattr(value, "shape") and hasattr(value, "columns"):
+            return int(value.shape[0])
+    return None
+
+
+def stage(name=None):
+    """
+    Decorator recording each call as a stage. Rows are taken from the
+    DataFrame returned, or else from a DataFrame first argument.
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _active_sinks():
+                return fn(*args, **kwargs)
+            with measure(label) as record:
+                result = fn(*args, **kwargs)
+                record["rows"] = _count_rows(args, result)
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+_DONE = object()
+
+
+def stream(name, chunks):
+    """
+    Yield from an iterable of chunks, recording the production of each one
+    as stage `name` (rows from the chunk). Time the consumer spends between
+    chunks is not counted, unlike a stage around the whole loop.
+    """
+    chunks = iter(chunks)
+    while True:
+        with measure(name) as record:
+            chunk = next(chunks, _DONE)
+            if chunk is _DONE:
+                record["discard"] = True
+            elif record:
+                record["rows"] = _count_rows((), chunk)
+        if chunk is _DONE:
+            return
+        yield chunk
@@ -0,0 +1,201 @@
+"""
+Background ingestion jobs for the app.
+
+One JobQueue per server process (the app keeps it in st.cache_resource)
+runs uploads on a shared thread pool, so max_workers is a global
+concurrency limit across every user. Queued jobs are dispatched round-robin
+between owners (sessions): a user who uploads fifty statements takes one
+slot at a time in turn with everybody else instead of filling the pool.
+
+Finished jobs are kept by (content digest, model fingerprint, merchant
+index version, store, path), so the same statement uploaded again in any
+session reuses the classified rows instead of being parsed and classified
+a second time, until the model is retrained or the merchant index changes
+(e.g. confirmed labels).
+Jobs save to the src.store backend ($TAXBRIDGE_STORE, else SQLite).
+"""
+import contextvars
+import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from src.merchants import index_version
+from src.model_registry import model_fingerprint
+from src.pipeline import ingest_file
+from src.store import default_path, store_name
+
+MAX_CONCURRENT_JOBS = max(2, min(4, os.cpu_count() or 1))
+
+# Smaller batches than the batch CLI, so progress and partial results
+# reach the UI often
+JOB_BATCH_SIZE = 5_000
+
+# Finished jobs kept for reuse, and for how long (seconds)
+RESULT_CACHE_SIZE = 8
+RESULT_TTL = 3600
+
+
+def estimate_rows(content, name):
+    """Rough row count for the progress bar (None when unknown up front)."""
+    ext = os.path.splitext(name.lower())[1]
+    if ext == ".csv":
+        return max(content.count(b"\n") - 1, 1)
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(io.BytesIO(content), read_only=True)
+        try:
+            return max((wb.worksheets[0].max_row or 1) - 1, 1)
+        finally:
+            wb.close()
+    return None
+
+
+class Job:
+    """
+    One uploaded file moving through read -> classify -> save. The worker
+    thread appends classified chunks as they are saved; readers take
+    snapshots, so the UI can show partial results while it runs.
+    """
+
+    def __init__(self, owner, name, content, digest=None, path=None, store=None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.name = name
+        self.digest = digest
+        self.key = None  # reuse key, set by JobQueue.submit
+        self.store = store_name(store)
+        self.path = path or default_path(self.store)
+        self.status = "queued"
+        self.rows = 0
+        self.total_rows = None
+        self.chunks = []
+        self.counts = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._content = content
+        # Run in the submitter's context, so stages go to its instrument sinks
+        self._context = contextvars.copy_context()
+
+    def _on_chunk(self, chunk, counts):
+        self.chunks.append(chunk)
+        self.rows += len(chunk)
+
+    def run(self):
+        self.status = "running"
+        self.started = time.time()
+        content, self._content = self._content, None
+        try:
+            self.total_rows = estimate_rows(content, self.name)
+            self.counts = ingest_file(
+                io.BytesIO(content), self.name, batch_size=JOB_BATCH_SIZE,
+                path=self.path, on_chunk=self._on_chunk, store=self.store,
+            )
+            self.status = "done"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.status = "failed"
+        finally:
+            self.finished = time.time()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def progress(self):
+        """Fraction done, for st.progress."""
+        if not self.active:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        # Estimates can undershoot (quoted newlines, trailing blank rows)
+        return min(self.rows / self.total_rows, 0.99)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def result(self):
+        """Classified rows so far (all of them once the job is done)."""
+        chunks = list(self.chunks)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+class JobQueue:
+    """Shared pool with a global concurrency limit and per-owner round-robin."""
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="taxbridge-job")
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # owner -> deque of queued jobs
+        self._running = 0
+        # (digest, model sha, merchant index version, store, path) -> done job
+        self._finished = OrderedDict()
+
+    def submit(self, owner, name, content, digest=None, path=None, store=None):
+        """
+        Queue a file and return its Job. With a content `digest`, a recent
+        finished job for the same content, model, merchant index and store
+        is returned instead; its rows are already saved.
+        """
+        job = Job(owner, name, content, digest, path, store)
+        key = None
+        if digest:
+            key = (digest, model_fingerprint(), index_version(), job.store, job.path)
+        job.key = key
+        with self._lock:
+            done = self._finished.get(key)
+            if done is not None and time.time() - done.finished < RESULT_TTL:
+                self._finished.move_to_end(key)
+                return done
+            self._finished.pop(key, None)
+            self._pending.setdefault(owner, deque()).append(job)
+            self._dispatch()
+        return job
+
+    def _dispatch(self):
+        # Caller holds self._lock
+        while self._running < self.max_workers and self._pending:
+            owner, queue = next(iter(self._pending.items()))
+            job = queue.popleft()
+            if queue:
+                self._pending.move_to_end(owner)
+            else:
+                del self._pending[owner]
+            self._running += 1
+            self._pool.submit(self._run, job)
+
+    def _run(self, job):
+        try:
+            job._context.run(job.run)
+        finally:
+            with self._lock:
+                if job.key is not None and job.status == "done":
+                    self._finished[job.key] = job
+                    while len(self._finished) > RESULT_CACHE_SIZE:
+                        self._finished.popitem(last=False)
+                self._running -= 1
+                self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            queued = sum(len(q) for q in self._pending.values())
+            return {"running": self._running, "queued": queued, "max_workers": self.max_workers}
+
+    def shutdown(self, wait=True):
+        """Cancel queued jobs and stop the pool (running jobs finish)."""
+        with self._lock:
+            for queue in self._pending.values():
+                for job in queue:
+                    job.status, job.error = "failed", "Cancelled: job queue shut down"
+            self._pending.clear()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,273 @@
+"""
+Known-merchant index: normalized merchant token -> category and GST rate.
+
+Most statement volume is a few hundred recurring counterparties, printed in
+the layouts of the payment rails:
+
+    UPI/412345678901/SWIGGY/swiggy@ybl/Payment      -> "swiggy"
+    NEFT/HDFCN52024012512/TATA POWER                -> "tata power"
+    IMPS/P2M/412345678901/ZOMATO                    -> "zomato"
+    POS 4111XXXXXX HP PETROL PUMP                   -> "hp petrol pump"
+    UBER RIDE 34432                                 -> "uber ride"
+
+Rows whose token is in the index are classified by a dictionary lookup;
+predict sends only the rest to the model. The index is a JSON file built
+from the training data (tokens seen at least MIN_SUPPORT times with one
+dominant category) plus user-confirmed labels, which always win:
+
+    python -m src.merchants --data data/training.csv --confirmed confirmed.csv
+"""
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from src.preprocess import clean_text_series, normalize_columns
+
+MERCHANT_INDEX_PATH = "models/merchants.json"
+INDEX_VERSION = 1
+
+# A training token is indexed when it was seen this often and this share of
+# its rows carry the same category
+MIN_SUPPORT = 3
+MIN_PURITY = 0.95
+
+# Merchant name inside the rail layouts. Matched on upper-cased narrations
+# whose digit runs are already collapsed to "0", so reference numbers
+# (optionally behind a bank code, e.g. HDFCN0) and the P2M/P2A markers are
+# skipped; the name ends at the next separator or VPA.
+RAIL_PATTERN = (
+    r'^(?:UPI|NEFT|RTGS|IMPS)[/-]'
+    r'(?:(?:P0[MA]|[A-Z]*0[A-Z0]*)[/-])*'
+    r'(?P<rail>[^/@]+?)\s*(?:[/@-]|$)'
+    r'|^POS\s+\S*X{2,}\S*\s+(?P<pos>.+)$'
+    r'|^ACH\s+[DC]-\s*(?P<ach>.+?)(?:-\w*0\w*)?$'
+)
+
+_lock = threading.Lock()
+_loaded = {}  # path -> (mtime_ns, index)
+_stats = {"rows": 0, "hits": 0}
+
+
+# ----------------------------
+# Merchant tokens
+# ----------------------------
+def merchant_keys(descriptions):
+    """
+    Normalized merchant token per narration ('' when there is none).
+    Narrations differing only in reference numbers share one layout, so
+    the extraction runs once per distinct layout rather than per row.
+    """
+    s = descriptions if isinstance(descriptions, pd.Series) else pd.Series(descriptions)
+    codes, uniques = pd.factorize(s)
+    layouts = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.replace(r'\d+', '0', regex=True)
+    layout_codes, layouts = pd.factorize(layouts)
+
+    text = pd.Series(layouts, dtype=object).str.strip().str.upper()
+    found = text.str.extract(RAIL_PATTERN)
+    name = found["rail"].fillna(found["pos"]).fillna(found["ach"]).fillna(text)
+
+    # Lower-cased words without digits: "UBER RIDE 34432" -> "uber ride"
+    keys = (
+        name.str.lower()
+        .str.replace(r'[^a-z0-9\s]', ' ', regex=True)
+        .str.replace(r'\b\w*\d\w*\b', ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    # NA narrations have code -1, which picks the trailing "" below
+    lookup = np.append(keys.to_numpy(dtype=object)[layout_codes], "")
+    return pd.Series(lookup[codes], index=s.index, dtype=object)
+
+
+# ----------------------------
+# Index file
+# ----------------------------
+def empty_index():
+    return {"version": INDEX_VERSION, "merchants": {}}
+
+
+def load_index(path=MERCHANT_INDEX_PATH):
+    """The index at `path` (empty if missing), re-read only when the file changes."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return empty_index()
+
+    with _lock:
+        cached = _loaded.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported merchant index version {index.get('version')}")
+        _loaded[path] = (mtime, index)
+        return index
+
+
+def index_version(path=MERCHANT_INDEX_PATH):
+    """
+    (mtime_ns, size) of the index file, or None when there is none. It
+    changes whenever the index is saved, e.g. by confirm_labels, so callers
+    can tell results classified against an older index.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def save_index(index, path=MERCHANT_INDEX_PATH):
+    """Write the index atomically, so a running app never reads half a file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _entries(df, source, min_support=1, min_purity=0.0):
+    """{token: entry} for the dominant category of each token in df."""
+    from src.predict import detect_gst_series
+
+    df = normalize_columns(df)
+    if "description" not in df.columns or "category" not in df.columns:
+        raise ValueError("labelled data needs a description/narration and a category column")
+
+    rows = pd.DataFrame({
+        "key": merchant_keys(df["description"]),
+        "category": df["category"].astype(str).str.strip().str.lower(),
+    })
+    if "gst_rate" in df.columns:
+        rows["gst_rate"] = pd.to_numeric(df["gst_rate"], errors="coerce")
+    else:
+        rows["gst_rate"] = detect_gst_series(clean_text_series(df["description"]))
+    rows = rows[rows["key"].ne("") & df["category"].notna().to_numpy()]
+
+    counts = rows.groupby(["key", "category"]).size().rename("n").reset_index()
+    support = counts.groupby("key")["n"].transform("sum")
+    counts["purity"] = counts["n"] / support
+    counts["support"] = support
+    best = counts.sort_values(["key", "n"], ascending=[True, False]).drop_duplicates("key")
+    best = best[(best["support"] >= min_support) & (best["purity"] >= min_purity)]
+
+    # GST rate: the most common rate among the token's rows of that category
+    rates = (
+        rows.merge(best[["key", "category"]])
+        .groupby("key")["gst_rate"]
+        .agg(lambda r: r.mode().iloc[0] if r.notna().any() else None)
+    )
+    return {
+        row.key: {
+            "category": row.category,
+            "gst_rate": None if pd.isna(rates.get(row.key)) else int(rates[row.key]),
+            "support": int(row.support),
+            "source": source,
+        }
+        for row in best.itertuples(index=False)
+    }
+
+
+def build_index(training, confirmed=None, previous=None,
+                min_support=MIN_SUPPORT, min_purity=MIN_PURITY):
+    """
+    Index from a labelled DataFrame (training) and optional confirmed labels
+    (description, category and optionally gst_rate). Confirmed entries of a
+    `previous` index are carried over; confirmed always beats training.
+    """
+    index = empty_index()
+    merchants = index["merchants"]
+    merchants.update(_entries(training, "training", min_support, min_purity))
+    if previous:
+        merchants.update({k: v for k, v in previous["merchants"].items() if v["source"] == "confirmed"})
+    if confirmed is not None and len(confirmed):
+        merchants.update(_entries(confirmed, "confirmed"))
+    return index
+
+
+def confirm_labels(labels, path=MERCHANT_INDEX_PATH):
+    """
+    Add user-confirmed labels (a DataFrame with description, category and
+    optionally gst_rate) to the index at `path`. Returns the tokens added.
+    """
+    index = load_index(path)
+    entries = _entries(labels, "confirmed")
+    updated = {"version": INDEX_VERSION, "merchants": {**index["merchants"], **entries}}
+    save_index(updated, path)
+    return sorted(entries)
+
+
+# ----------------------------
+# Lookup
+# ----------------------------
+def lookup(descriptions, index=None):
+    """
+    Resolve narrations against the index in one vectorized pass.
+    Returns (category, gst_rate): a Categorical that is missing where the
+    merchant is unknown, and float GST rates (NaN when unknown or unset).
+    """
+    index = load_index() if index is None else index
+    merchants = index["merchants"]
+
+    keys = merchant_keys(descriptions)
+    codes, uniques = pd.factorize(keys)
+    uniques = pd.Series(uniques, dtype=object)
+
+    entry = uniques.map(merchants)
+    category = entry.map(lambda e: e["category"], na_action="ignore")
+    rate = entry.map(lambda e: e["gst_rate"], na_action="ignore")
+
+    cat_codes, categories = pd.factorize(category)
+    category = pd.Categorical.from_codes(np.append(cat_codes, -1)[codes], categories)
+    rate = np.append(pd.to_numeric(rate, errors="coerce").to_numpy(dtype=float), np.nan)[codes]
+
+    with _lock:
+        _stats["rows"] += len(keys)
+        _stats["hits"] += int(pd.notna(category).sum())
+    return category, rate
+
+
+def index_stats():
+    """Rows looked up since process start (or reset_stats), hits and hit share."""
+    with _lock:
+        stats = dict(_stats)
+    stats["hit_share"] = stats["hits"] / stats["rows"] if stats["rows"] else 0.0
+    return stats
+
+
+def reset_stats():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the known-merchant index.")
+    parser.add_argument("--data", default="data/training.csv", help="labelled CSV")
+    parser.add_argument("--confirmed", help="CSV of user-confirmed labels")
+    parser.add_argument("--out", default=MERCHANT_INDEX_PATH)
+    parser.add_argument("--min-support", type=int, default=MIN_SUPPORT)
+    parser.add_argument("--min-purity", type=float, default=MIN_PURITY)
+    args = parser.parse_args(argv)
+
+    try:
+        confirmed = pd.read_csv(args.confirmed) if args.confirmed else None
+        index = build_index(
+            pd.read_csv(args.data), confirmed, load_index(args.out),
+            args.min_support, args.min_purity,
+        )
+    except (OSError, ValueError) as e:
+        print("ERROR:", e)
+        return
+    save_index(index, args.out)
+    sources = Counter(e["source"] for e in index["merchants"].values())
+    print(f"Indexed {len(index['merchants'])} merchants ({dict(sources)}) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
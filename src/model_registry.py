@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+
+MODEL_PATH = "models/model.joblib"
+
+# NumPy-only export of the same model (see src/fast_predict.py)
+COMPILED_MODEL_PATH = "models/model.npz"
+
+# path -> {"model", "mtime", "size", "sha256", "mmap"}
+_entries = {}
+_lock = threading.Lock()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_model_path():
+    """
+    The compiled .npz when it exists and is at least as new as the joblib
+    pickle (so a later retrain without an export is never shadowed).
+    """
+    try:
+        compiled = os.stat(COMPILED_MODEL_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return MODEL_PATH
+    try:
+        if compiled < os.stat(MODEL_PATH).st_mtime_ns:
+            return MODEL_PATH
+    except FileNotFoundError:
+        pass
+    return COMPILED_MODEL_PATH
+
+
+def _load(path, mmap):
+    if path.endswith(".npz"):
+        # np.savez_compressed archives cannot be memory-mapped; the compiled
+        # model is small enough that a private copy per process is fine.
+        from src.fast_predict import load_model
+        return load_model(path)
+
+    import joblib
+
+    # mmap_mode="r" maps the numpy arrays (idf weights, coefficients) read-only,
+    # so forked workers share the same pages instead of holding private copies.
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def get_model(path=None, mmap=None):
+    """
+    Return the model stored at `path` (default_model_path() if omitted),
+    loading it once per process.
+    The file is only deserialized again when its mtime/size changed AND its
+    content hash differs from the loaded copy, or when `mmap` is given and
+    differs from how the loaded copy was read. mmap=None reuses whatever is
+    loaded (a private copy if nothing is).
+    """
+    path = path or default_model_path()
+    stat = os.stat(path)  # FileNotFoundError if the model was never trained
+
+    with _lock:
+        entry = _entries.get(path)
+        if entry and mmap is not None and entry["mmap"] != mmap:
+            entry = None
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["model"]
+
+        digest = file_sha256(path)
+        if entry and entry["sha256"] == digest:
+            # Touched but not changed (e.g. copied over with the same bytes)
+            entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+            return entry["model"]
+
+        mmap = bool(mmap) if mmap is not None else bool(_entries.get(path, {}).get("mmap"))
+        model = _load(path, mmap)
+        _entries[path] = {
+            "model": model,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "mmap": mmap,
+        }
+        return model
+
+
+def model_fingerprint(path=None, mmap=None):
+    """Return the content hash of the currently loaded model at `path`."""
+    path = path or default_model_path()
+    get_model(path, mmap=mmap)
+    return _entries[path]["sha256"]
+
+
+def warm_up(path=None, mmap=None):
+    """
+    Load the model ahead of the first request (app startup, worker init).
+    Returns the model fingerprint.
+    """
+    return model_fingerprint(path, mmap=mmap)
+
+
+def clear():
+    """Drop every loaded model (mainly for tests and long-running workers)."""
+    with _lock:
+        _entries.clear()
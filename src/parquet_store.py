@@ -0,0 +1,395 @@
+"""
+Optional columnar transaction store: Parquet files partitioned by month.
+
+    <STORE_PATH>/month=2024-04/part-<id>.parquet
+
+save_transactions has the same interface and idempotency as
+src.db.save_transactions. Readers project columns and prune partitions,
+so a one-quarter summary only opens that quarter's files. Category and
+GST rate are dictionary-encoded. Requires pyarrow (imported on first use).
+Writes are serialized by a lock file in the store directory, so several
+processes (e.g. batch workers) can write to one store.
+
+Rewriting a month swaps its files through a journal (_rewrite.json), so a
+crash mid-swap never exposes a row twice: readers apply the journal, and
+the next write to the month completes the swap.
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from src import instrument
+from src.db import (
+    DB_PATH, TRANSACTION_COLUMNS, UPSERT_COLUMNS, _date_keys, month_keys,
+    transaction_fingerprints,
+)
+
+# Lives next to taxbridge.db so it follows the same deployment volume
+STORE_PATH = os.path.join(os.path.dirname(DB_PATH), "transactions_parquet")
+
+STORED_COLUMNS = TRANSACTION_COLUMNS + ["fingerprint"]
+DICTIONARY_COLUMNS = ["predicted_category", "gst_rate"]
+
+# Partition directory for rows without a parseable date (month key "")
+UNDATED = "undated"
+
+JOURNAL = "_rewrite.json"
+PENDING = ".pending"  # suffix of a rewritten file not yet swapped in
+
+# Held by the writing process for the whole read-compare-write of a save
+LOCK_FILE = "_write.lock"
+
+_lock = threading.Lock()
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The Parquet store needs pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def _schema(pa):
+    return pa.schema([
+        ("date", pa.string()),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("predicted_category", pa.dictionary(pa.int32(), pa.string())),
+        ("deductible", pa.int8()),
+        ("gst_rate", pa.int8()),
+        ("gst_input", pa.float64()),
+        ("fingerprint", pa.string()),
+    ])
+
+
+def init_store(path=STORE_PATH):
+    """Create the store directory; fails early when pyarrow is missing."""
+    _pyarrow()
+    os.makedirs(path, exist_ok=True)
+
+
+def _lock_file(f, lock):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        # LK_LOCK retries for about 10s before raising OSError
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if lock else msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_EX if lock else fcntl.LOCK_UN)
+
+
+@contextmanager
+def _write_lock(path):
+    """
+    Exclusive write access to the store: the thread lock within this
+    process, and an OS lock on LOCK_FILE across processes. Readers never
+    take it; the journal keeps what they see consistent.
+    """
+    os.makedirs(path, exist_ok=True)
+    with _lock, open(os.path.join(path, LOCK_FILE), "a+b") as f:
+        _lock_file(f, True)
+        try:
+            yield
+        finally:
+            _lock_file(f, False)
+
+
+# ----------------------------
+# Partitions
+# ----------------------------
+def _partition_dir(month, path):
+    return os.path.join(path, f"month={month or UNDATED}")
+
+
+def partition_months(path=STORE_PATH):
+    """Month keys present in the store ('' for undated), sorted."""
+    if not os.path.isdir(path):
+        return []
+    months = []
+    for name in os.listdir(path):
+        if name.startswith("month="):
+            month = name[len("month="):]
+            months.append("" if month == UNDATED else month)
+    return sorted(months)
+
+
+def _in_range(month, start_month, end_month):
+    # Same comparisons as db._summary: undated ('') sorts before any month
+    return (not start_month or month >= start_month) and (not end_month or month <= end_month)
+
+
+def _journal(folder):
+    """The pending rewrite of a partition: {"file", "replaces"}, or None."""
+    try:
+        with open(os.path.join(folder, JOURNAL), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _visible_files(folder):
+    """Data files of a partition, as of its last committed write."""
+    listed = os.listdir(folder)
+    names = [n for n in listed if n.endswith(".parquet")]
+    journal = _journal(folder)
+    if journal:
+        # Mid-swap: the rewritten file (pending or already renamed) stands
+        # in for every file it replaces
+        replaced = set(journal["replaces"])
+        names = [n for n in names if n not in replaced]
+        if journal["file"] not in names and journal["file"] + PENDING in listed:
+            names.append(journal["file"] + PENDING)
+    return [os.path.join(folder, n) for n in sorted(names)]
+
+
+def partition_files(start_month=None, end_month=None, path=STORE_PATH):
+    """[(month, file)] for the partitions in [start_month, end_month] only."""
+    files = []
+    for month in partition_months(path):
+        if not _in_range(month, start_month, end_month):
+            continue
+        files.extend((month, file) for file in _visible_files(_partition_dir(month, path)))
+    return files
+
+
+# ----------------------------
+# Reading
+# ----------------------------
+def read_transactions(columns=None, start_month=None, end_month=None, path=STORE_PATH):
+    """
+    Load stored transactions, reading only `columns` (plus "month", taken
+    from the partition name) from the partitions in range.
+    """
+    pa, pq = _pyarrow()
+    columns = list(columns) if columns is not None else STORED_COLUMNS + ["month"]
+    file_columns = [c for c in columns if c != "month"]
+
+    frames = []
+    for month, file in partition_files(start_month, end_month, path):
+        frame = pq.read_table(file, columns=file_columns).to_pandas()
+        if "month" in columns:
+            frame["month"] = month
+        frames.append(frame)
+
+    if not frames:
+        empty = pa.Table.from_batches([], _schema(pa)).to_pandas()
+        if "month" in columns:
+            empty["month"] = pd.Series(dtype=object)
+        return empty[columns]
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def _read_partition(month, path, columns=None):
+    _, pq = _pyarrow()
+    files = [f for m, f in partition_files(month or None, month or None, path) if m == month]
+    if not files:
+        return None, []
+    frames = [pq.read_table(f, columns=columns).to_pandas() for f in files]
+    return pd.concat(frames, ignore_index=True), files
+
+
+# ----------------------------
+# Writing
+# ----------------------------
+def _write_file(frame, month, path, suffix=""):
+    """Write one Parquet file into the month partition, atomically."""
+    pa, pq = _pyarrow()
+    folder = _partition_dir(month, path)
+    os.makedirs(folder, exist_ok=True)
+
+    frame = frame[STORED_COLUMNS].copy()
+    frame["predicted_category"] = frame["predicted_category"].astype(object).where(
+        frame["predicted_category"].notna(), None)
+    table = pa.Table.from_pandas(frame, schema=_schema(pa), preserve_index=False)
+
+    file = os.path.join(folder, f"part-{uuid.uuid4().hex}.parquet")
+    pq.write_table(table, file + ".tmp", use_dictionary=DICTIONARY_COLUMNS, compression="zstd")
+    os.replace(file + ".tmp", file + suffix)
+    return file
+
+
+def _remove(file):
+    try:
+        os.remove(file)
+    except FileNotFoundError:
+        pass
+
+
+def _finish_rewrite(folder):
+    """Complete an interrupted swap and drop files no journal refers to."""
+    journal = _journal(folder)
+    if journal:
+        file = os.path.join(folder, journal["file"])
+        if os.path.exists(file + PENDING):
+            os.replace(file + PENDING, file)
+        for name in journal["replaces"]:
+            _remove(os.path.join(folder, name))
+        _remove(os.path.join(folder, JOURNAL))
+    for name in os.listdir(folder):
+        # Written before a crash but never committed
+        if name.endswith(".tmp") or name.endswith(PENDING):
+            _remove(os.path.join(folder, name))
+
+
+def _rewrite_partition(frame, month, path, files):
+    """
+    Replace a partition's `files` with one file holding `frame`. The journal
+    is committed before any visible file changes, so every crash point
+    leaves either the old files or the new one in effect, never both.
+    """
+    folder = _partition_dir(month, path)
+    file = _write_file(frame, month, path, suffix=PENDING)
+    journal = {"file": os.path.basename(file), "replaces": [os.path.basename(f) for f in files]}
+    with open(os.path.join(folder, JOURNAL + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(journal, f)
+    os.replace(os.path.join(folder, JOURNAL + ".tmp"), os.path.join(folder, JOURNAL))
+    _finish_rewrite(folder)
+
+
+def _same(a, b):
+    """Element-wise equality that treats two missing values as equal."""
+    a, b = a.astype(object), b.astype(object)
+    return (a == b) | (a.isna() & b.isna())
+
+
+def _prepare(df, seen):
+    frame = df.reindex(columns=TRANSACTION_COLUMNS)
+    frame["fingerprint"] = transaction_fingerprints(df, seen)
+    months = pd.Series(month_keys(frame["date"]), index=frame.index)
+    frame["date"] = _date_keys(frame["date"]).replace("", None)
+    for col in ["deductible", "gst_rate"]:
+        frame[col] = pd.to_numeric(frame[col], errors="coerce").round().astype("Int8")
+    for col in ["amount", "gst_input"]:
+        frame[col] = pd.to_numeric(frame[col], errors="coerce").astype(float)
+    frame["description"] = frame["description"].astype(object).where(frame["description"].notna(), None)
+    return frame, months
+
+
+@instrument.stage("parquet_store.save_transactions")
+def save_transactions(df: pd.DataFrame, path=STORE_PATH, seen=None):
+    """
+    Idempotently write classified transactions into their month partitions.
+    New rows are appended as a new file; if any stored row changed its
+    category/deductible/GST, that month is rewritten as one compacted file.
+    Returns {"inserted", "updated", "skipped"} counts.
+    """
+    _pyarrow()
+    frame, months = _prepare(df, seen)
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+
+    with _write_lock(path):
+        for month, part in frame.groupby(months, sort=True):
+            if os.path.isdir(_partition_dir(month, path)):
+                _finish_rewrite(_partition_dir(month, path))
+            stored, files = _read_partition(month, path, ["fingerprint"] + UPSERT_COLUMNS)
+            if stored is None:
+                _write_file(part, month, path)
+                counts["inserted"] += len(part)
+                continue
+
+            stored = stored.set_index("fingerprint")
+            known = part["fingerprint"].isin(stored.index)
+            new = part[~known]
+
+            old = stored.loc[part.loc[known, "fingerprint"]]
+            same = np.ones(len(old), dtype=bool)
+            for col in UPSERT_COLUMNS:
+                same &= _same(part.loc[known, col].reset_index(drop=True),
+                              old[col].reset_index(drop=True)).to_numpy()
+            changed = part[known][~same]
+
+            if len(changed):
+                full, _ = _read_partition(month, path)
+                full = full.set_index("fingerprint")
+                updates = changed.set_index("fingerprint")[UPSERT_COLUMNS]
+                for col in UPSERT_COLUMNS:
+                    full[col] = full[col].astype(object)
+                full.loc[updates.index, UPSERT_COLUMNS] = updates.astype(object)
+                rewritten = pd.concat([full.reset_index(), new], ignore_index=True)
+                _rewrite_partition(rewritten, month, path, files)
+            elif len(new):
+                _write_file(new, month, path)
+
+            counts["inserted"] += len(new)
+            counts["updated"] += len(changed)
+            counts["skipped"] += int(same.sum())
+
+    return counts
+
+
+def save_transaction_chunks(chunks, path=STORE_PATH, on_chunk=None):
+    """Chunked counterpart of save_transactions, like db.save_transaction_chunks."""
+    totals = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    seen = {}
+    for chunk in chunks:
+        counts = save_transactions(chunk, path, seen=seen)
+        totals["rows"] += len(chunk)
+        for key, count in counts.items():
+            totals[key] += count
+        if on_chunk:
+            on_chunk(chunk, counts)
+    return totals
+
+
+# ----------------------------
+# Summaries (same columns as the db.*_summary functions)
+# ----------------------------
+def _summary(group_by, start_month, end_month, path):
+    columns = ["amount", "gst_input", "gst_rate", "deductible"]
+    if group_by == "month":
+        columns.append("month")
+    elif group_by == "category":
+        columns.append("predicted_category")
+    df = read_transactions(columns, start_month, end_month, path)
+    df = df.rename(columns={"predicted_category": "category"})
+
+    # Missing GST rate / category group as 0 / '', like the COALESCE in the
+    # db rollup key
+    amount = df["amount"].fillna(0.0)
+    rate = df["gst_rate"].astype(float).fillna(0.0)
+    parts = pd.DataFrame({
+        "txn_count": np.ones(len(df), dtype=np.int64),
+        "total_spend": amount,
+        "gst_input": df["gst_input"].fillna(0.0),
+        "taxable_spend": amount.where(rate > 0, 0.0),
+        "gst_applicable": (rate > 0).astype(np.int64),
+        "gst_not_applicable": (rate == 0).astype(np.int64),
+        "deductible_count": df["deductible"].fillna(0).astype(np.int64),
+    })
+    if not group_by:
+        return pd.DataFrame([{col: parts[col].sum() for col in parts.columns}])
+    if group_by == "category":
+        parts[group_by] = df[group_by].astype(object).fillna("")
+    elif group_by == "gst_rate":
+        parts[group_by] = rate.astype(np.int64)
+    else:
+        parts[group_by] = df[group_by]
+    return parts.groupby(group_by, sort=True, dropna=False).sum().reset_index()
+
+
+def monthly_summary(start_month=None, end_month=None, path=STORE_PATH):
+    """Spend, GST input and counts per month."""
+    return _summary("month", start_month, end_month, path)
+
+
+def category_summary(start_month=None, end_month=None, path=STORE_PATH):
+    """Spend, GST input and counts per predicted category."""
+    return _summary("category", start_month, end_month, path)
+
+
+def gst_summary(start_month=None, end_month=None, path=STORE_PATH):
+    """Spend and GST input per GST rate, reading only the months in range."""
+    return _summary("gst_rate", start_month, end_month, path)
+
+
+def summary_totals(start_month=None, end_month=None, path=STORE_PATH):
+    """Headline numbers as a dict."""
+    row = _summary(None, start_month, end_month, path).to_dict("records")[0]
+    return {k: (0 if pd.isna(v) else v) for k, v in row.items()}
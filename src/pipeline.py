@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+from src.predict import classify_chunks
+from src.store import default_path, get_store
+
+# Rows per batch through normalize -> prepare -> classify -> save
+BATCH_SIZE = 50_000
+
+# PDF statements are streamed by page rather than by row
+PDF_PAGES_PER_CHUNK = 20
+
+
+def iter_csv_chunks(file, batch_size=BATCH_SIZE):
+    """Read a CSV in batches of rows."""
+    yield from pd.read_csv(file, chunksize=batch_size)
+
+
+def iter_xlsx_chunks(file, batch_size=BATCH_SIZE):
+    """
+    Read the first sheet of an XLSX in batches of rows, using openpyxl's
+    read-only mode so the workbook is streamed rather than loaded whole.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [f"column_{i}" if h is None else str(h) for i, h in enumerate(header)]
+
+        batch = []
+        for row in rows:
+            if row and any(v is not None for v in row):
+                batch.append(row[:len(header)])
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        wb.close()
+
+
+def iter_upload_chunks(file, name=None, batch_size=BATCH_SIZE, workers=1):
+    """Stream a PDF, CSV or Excel statement as raw DataFrame chunks."""
+    name = (name or getattr(file, "name", None) or str(file)).lower()
+    ext = os.path.splitext(name)[1]
+
+    if ext == ".pdf":
+        from src.read_pdf import iter_pdf_bank_statement
+        return iter_pdf_bank_statement(file, pages_per_chunk=PDF_PAGES_PER_CHUNK, workers=workers)
+    if ext == ".csv":
+        return iter_csv_chunks(file, batch_size)
+    if ext == ".xlsx":
+        return iter_xlsx_chunks(file, batch_size)
+    if ext == ".xls":
+        # Legacy .xls has no streaming reader; read it in one go
+        return iter([pd.read_excel(file)])
+    raise ValueError(f"Unsupported statement type: {name}")
+
+
+def ingest_file(file, name=None, batch_size=BATCH_SIZE, path=None, on_chunk=None, workers=1,
+                store=None):
+    """
+    Stream one statement through classification into the transaction store
+    (src.store: SQLite unless `store` or $TAXBRIDGE_STORE says "parquet"),
+    one batch at a time, so memory is bounded by batch_size regardless of
+    file size. `path` defaults to the store's own. on_chunk(classified_chunk,
+    counts) sees each batch after saving.
+    Returns {"rows", "inserted", "updated", "skipped"}.
+    """
+    path = path or default_path(store)
+    chunks = iter_upload_chunks(file, name, batch_size, workers=workers)
+    return get_store(store).save_transaction_chunks(classify_chunks(chunks), path, on_chunk=on_chunk)
+
+
+def read_upload(file, name=None, workers=1):
+    """Read a whole PDF, CSV or Excel statement into one raw DataFrame."""
+    chunks = list(iter_upload_chunks(file, name, workers=workers))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
@@ -1,8 +1,11 @@
-import joblib
+import re
+import sqlite3
+import numpy as np
 import pandas as pd
-from src.preprocess import prepare_dataframe
-
-MODEL_PATH = "models/model.joblib"
+from src.dates import parse_dates
+from src.preprocess import detect_date_format, prepare_dataframe
+from src.model_registry import default_model_path, get_model, model_fingerprint
+from src import instrument, merchants, prediction_cache
 
 # GST keyword rules
 GST_KEYWORDS = {
@@ -19,30 +22,222 @@ def detect_gst(description):
             return int(rate)
     return 0  # No GST identified
 
-def classify_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    df = prepare_dataframe(df)
 
+# One alternation regex per rate, built once from the keyword table.
+# Kept in GST_KEYWORDS order so the first matching rate wins, like detect_gst.
+GST_RATES = np.array([int(rate) for rate in GST_KEYWORDS], dtype=np.int64)
+GST_PATTERNS = [
+    "|".join(re.escape(w) for w in words) for words in GST_KEYWORDS.values()
+]
+
+
+def detect_gst_series(descriptions: pd.Series) -> pd.Series:
+    """Vectorized detect_gst: one regex pass per rate over the whole column."""
+    text = descriptions.astype(str).str.lower()
+    conditions = [
+        text.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+        for pattern in GST_PATTERNS
+    ]
+    rates = np.select(conditions, GST_RATES, default=0)
+    return pd.Series(rates, index=descriptions.index)
+
+
+def _round_paise(values):
+    """
+    Round to 2 decimals exactly like Python's round(): to the nearest paisa
+    of the binary value, exact ties to even. np.round scales by 100 first,
+    which can land either side of a half-paisa, so those near-ties (about 1
+    row in 100 for 2-decimal amounts) are re-rounded with round() itself.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(np.abs(scaled), 1.0)
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def gst_input(amount, gst_rate):
+    """GST input credit per row: amount * rate / 100, rounded to paise."""
+    amount = np.asarray(amount, dtype=float)
+    gst_rate = np.asarray(gst_rate)
+    return np.where(gst_rate > 0, _round_paise(amount * gst_rate / 100), 0.0)
+
+
+# Distinct descriptions per predict_proba call; bounds the probability matrix
+PREDICT_BATCH = 100_000
+
+# Model predictions below this probability are flagged needs_review
+REVIEW_THRESHOLD = 0.6
+
+
+def _predict_labels(model, docs):
+    """(labels, confidence): the most probable class per doc and its probability."""
+    if not hasattr(model, "predict_proba"):
+        return list(model.predict(docs)), [np.nan] * len(docs)
+
+    classes = np.asarray(model.classes_, dtype=object)
+    labels, confidence = [], []
+    for start in range(0, len(docs), PREDICT_BATCH):
+        proba = model.predict_proba(docs[start:start + PREDICT_BATCH])
+        best = proba.argmax(axis=1)
+        labels.extend(classes[best])
+        confidence.extend(proba[np.arange(len(best)), best].tolist())
+    return labels, confidence
+
+
+def predict_categories(model, clean_desc: pd.Series, fingerprint=None, return_confidence=False):
+    """
+    Predict one category per row, running the model only on distinct
+    descriptions. With a fingerprint, results are read from and written to
+    the persistent prediction cache. Returns a Categorical, so per-row
+    labels are small integer codes rather than string objects; with
+    return_confidence, also the float32 probability of each label.
+    """
+    codes, uniques = pd.factorize(clean_desc)
+    uniques = list(uniques)
+
+    known = {}
+    if fingerprint:
+        prediction_cache.record_rows(len(clean_desc))
+        try:
+            known = prediction_cache.lookup(uniques, fingerprint)
+        except sqlite3.Error:
+            known = {}  # a broken cache must never block classification
+
+    missing = [d for d in uniques if d not in known]
+    if missing:
+        fresh = dict(zip(missing, zip(*_predict_labels(model, missing))))
+        if fingerprint:
+            try:
+                prediction_cache.store(fresh, fingerprint)
+            except sqlite3.Error:
+                pass
+        known.update(fresh)
+
+    # Map description codes to label codes; NA descriptions (code -1) pick
+    # the trailing -1, i.e. a missing label
+    results = [known[d] for d in uniques]
+    label_codes, categories = pd.factorize(pd.Series([r[0] for r in results], dtype=object))
+    label_codes = np.append(label_codes, -1)
+    category = pd.Categorical.from_codes(label_codes[codes], categories)
+    if not return_confidence:
+        return category
+    confidence = np.append(np.array([r[1] for r in results], dtype=np.float32), np.nan)
+    return category, confidence[codes]
+
+
+def _merge_categoricals(mask, first, rest):
+    """
+    Row-wise combination without going through objects: `first` (full
+    length) where mask is set, `rest` (one value per unset row) elsewhere.
+    """
+    categories = first.categories.union(rest.categories)
+    codes = np.full(len(mask), -1, dtype=np.int32)
+    codes[mask] = np.append(categories.get_indexer(first.categories), -1)[first.codes[mask]]
+    codes[~mask] = np.append(categories.get_indexer(rest.categories), -1)[rest.codes]
+    return pd.Categorical.from_codes(codes, categories)
+
+
+# ----------------------------
+# Compact schema of classified frames
+# ----------------------------
+DEDUCTIBLE_CATEGORIES = ["travel", "office", "fuel", "utilities"]
+
+# How each row was labelled (label_source)
+LABEL_SOURCES = ["merchant", "model"]
+
+# GST rates and the deductible flag fit in one byte
+INT8_COLUMNS = ["deductible", "gst_rate"]
+
+# Store text columns as Arrow-backed strings (needs pyarrow). pandas 3
+# already does this for columns it reads; clean_desc is built as objects.
+ARROW_STRINGS = False
+STRING_COLUMNS = ["description", "clean_desc"]
+
+
+def apply_schema(df, arrow_strings=None):
+    """
+    Cast a classified DataFrame to the compact schema, in place: datetime64
+    date, categorical predicted_category, int8 deductible/gst_rate and,
+    with arrow_strings (default ARROW_STRINGS), Arrow-backed text columns.
+    Idempotent, so it also restores the schema after concatenating chunks
+    whose categories differ. Returns df.
+    """
+    if "date" in df.columns:
+        df["date"] = parse_dates(df["date"])
+    if "predicted_category" in df.columns and not isinstance(
+        df["predicted_category"].dtype, pd.CategoricalDtype
+    ):
+        df["predicted_category"] = df["predicted_category"].astype("category")
+    for col in INT8_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int8:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(np.int8)
+
+    if arrow_strings is None:
+        arrow_strings = ARROW_STRINGS
+    if arrow_strings:
+        for col in STRING_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype(pd.StringDtype("pyarrow"))
+    return df
+
+
+@instrument.stage()
+def classify_dataframe(df: pd.DataFrame, use_cache=True, date_format=None) -> pd.DataFrame:
+    df = prepare_dataframe(df, date_format)
+
+    model_path = default_model_path()
     try:
-        model = joblib.load(MODEL_PATH)
+        model = get_model(model_path)
     except Exception as e:
         raise RuntimeError(f"Model not found. Train it first. ({e})")
 
-    # ML predictions
-    predictions = model.predict(df["clean_desc"])
-    df["predicted_category"] = predictions
+    # Known merchants are a dictionary lookup; only the rest go to the model
+    with instrument.measure("classify_dataframe.merchants", rows=len(df)):
+        merchant_category, merchant_gst = merchants.lookup(df["description"])
+        known = pd.notna(merchant_category)
 
-    # Deductible logic
-    deductible_cats = ["travel", "office", "fuel", "utilities"]
-    df["deductible"] = df["predicted_category"].apply(
-        lambda x: 1 if x in deductible_cats else 0
+    # ML predictions (distinct descriptions only, cached per model version)
+    fingerprint = model_fingerprint(model_path) if use_cache else None
+    with instrument.measure("classify_dataframe.predict", rows=int((~known).sum())):
+        predicted, confidence = predict_categories(
+            model, df["clean_desc"][~known], fingerprint, return_confidence=True
+        )
+
+    df["predicted_category"] = _merge_categoricals(known, merchant_category, predicted)
+    df["confidence"] = np.ones(len(df), dtype=np.float32)
+    df.loc[~known, "confidence"] = confidence
+    # NaN confidence (a model without predict_proba) is never flagged
+    df["needs_review"] = df["confidence"] < REVIEW_THRESHOLD
+    df["label_source"] = pd.Categorical.from_codes(
+        np.where(known, 0, 1).astype(np.int8), LABEL_SOURCES
     )
 
+    # Deductible logic
+    df["deductible"] = df["predicted_category"].isin(DEDUCTIBLE_CATEGORIES).astype(np.int8)
+
     # GST calculation
-    df["gst_rate"] = df["clean_desc"].apply(detect_gst)
-    df["gst_input"] = df.apply(
-        lambda row: round((row["amount"] * row["gst_rate"]) / 100, 2)
-        if row["gst_rate"] > 0 else 0,
-        axis=1
-    )
+    with instrument.measure("classify_dataframe.gst", rows=len(df)):
+        rate = detect_gst_series(df["clean_desc"]).to_numpy(copy=True)
+        # Indexed merchants carry their own rate (confirmed labels may set it)
+        indexed = known & ~np.isnan(merchant_gst)
+        rate[indexed] = merchant_gst[indexed]
+        df["gst_rate"] = pd.Series(rate, index=df.index).astype(np.int8)
+        df["gst_input"] = gst_input(df["amount"], df["gst_rate"])
 
-    return df
+    return apply_schema(df)
+
+
+def classify_chunks(chunks, use_cache=True):
+    """
+    Lazily classify an iterable of DataFrame chunks, one chunk at a time.
+    The chunks are one statement: its date format is detected on the first
+    chunk that has dates and used for every later chunk.
+    """
+    date_format = None
+    for chunk in chunks:
+        if date_format is None:
+            date_format = detect_date_format(chunk)
+        yield classify_dataframe(chunk, use_cache=use_cache, date_format=date_format)
@@ -0,0 +1,219 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+from src.db import DB_PATH, PRAGMAS, write_transaction
+
+# Lives next to taxbridge.db so it follows the same deployment volume
+CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), "prediction_cache.db")
+MAX_ENTRIES = 200_000
+
+# Entries are keyed by model fingerprint, so processes running different
+# model versions (app and batch mid-deploy) share the file without clashing.
+# Entries unused this long are dropped whatever their model; those of a
+# retired model can also be dropped at once with purge().
+STALE_AFTER = 7 * 24 * 3600  # seconds
+
+# Hits refresh last_used at most this often, so repeat lookups stay reads
+TOUCH_AFTER = 3600  # seconds
+
+# SQLite caps the number of bound parameters per statement
+_BATCH = 500
+
+# Stored in PRAGMA user_version; a cache file of another version is
+# dropped and rebuilt (it only holds recomputable predictions).
+# 2: per-entry model confidence.
+# 3: entry count kept by triggers in prediction_cache_size.
+CACHE_VERSION = 3
+
+_lock = threading.Lock()
+_stats = {"rows": 0, "hits": 0, "misses": 0}
+_local = threading.local()
+
+
+def _create_schema(conn):
+    conn.execute("DROP TABLE IF EXISTS prediction_cache")
+    conn.execute("DROP TABLE IF EXISTS prediction_cache_size")
+    conn.execute('''
+    CREATE TABLE prediction_cache (
+        clean_desc TEXT NOT NULL,
+        model TEXT NOT NULL,
+        category TEXT NOT NULL,
+        confidence REAL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (clean_desc, model)
+    )
+    ''')
+    conn.execute("CREATE INDEX idx_cache_last_used ON prediction_cache(last_used)")
+
+    # Kept exact by triggers so store() never counts the whole table
+    conn.execute("CREATE TABLE prediction_cache_size (entries INTEGER NOT NULL)")
+    conn.execute("INSERT INTO prediction_cache_size VALUES (0)")
+    conn.execute('''
+    CREATE TRIGGER prediction_cache_insert AFTER INSERT ON prediction_cache
+    BEGIN UPDATE prediction_cache_size SET entries = entries + 1; END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER prediction_cache_delete AFTER DELETE ON prediction_cache
+    BEGIN UPDATE prediction_cache_size SET entries = entries - 1; END
+    ''')
+    conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    with write_transaction(conn):
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version != CACHE_VERSION:
+            _create_schema(conn)
+    return conn
+
+
+def get_connection(path=CACHE_PATH):
+    """Return this thread's reusable connection to the cache at `path`."""
+    conns = _local.__dict__.setdefault("conns", {})
+    conn = conns.get(str(path))
+    if conn is None:
+        conn = conns[str(path)] = _connect(path)
+    return conn
+
+
+def close_connections():
+    """Close the cache connections opened by the current thread."""
+    for conn in _local.__dict__.pop("conns", {}).values():
+        conn.close()
+
+
+def _batches(items):
+    for i in range(0, len(items), _BATCH):
+        yield items[i:i + _BATCH]
+
+
+def lookup(descriptions, fingerprint, path=CACHE_PATH):
+    """
+    Return {clean_desc: (category, confidence)} for the descriptions already
+    cached for this model. Only hits last used more than TOUCH_AFTER ago
+    are written back, so a warm cache is read without taking the write lock.
+    """
+    descriptions = list(descriptions)
+    found = {}
+    now = time.time()
+    conn = get_connection(path)
+
+    touch = []
+    for batch in _batches(descriptions):
+        marks = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT clean_desc, category, confidence, last_used FROM prediction_cache "
+            f"WHERE model = ? AND clean_desc IN ({marks})",
+            [fingerprint, *batch],
+        ).fetchall()
+        found.update((desc, (cat, conf)) for desc, cat, conf, _ in rows)
+        touch.extend(desc for desc, _, _, used in rows if used < now - TOUCH_AFTER)
+
+    if touch:
+        with write_transaction(conn):
+            for batch in _batches(touch):
+                conn.execute(
+                    f"UPDATE prediction_cache SET last_used = ? "
+                    f"WHERE model = ? AND clean_desc IN ({','.join('?' * len(batch))})",
+                    [now, fingerprint, *batch],
+                )
+
+    with _lock:
+        _stats["hits"] += len(found)
+        _stats["misses"] += len(descriptions) - len(found)
+
+    return found
+
+
+def store(predictions, fingerprint, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+    """
+    Save {clean_desc: (category, confidence)} for this model, then drop
+    entries unused for STALE_AFTER and, if the table grew past max_entries,
+    evict the least recently used entries.
+    """
+    now = time.time()
+    conn = get_connection(path)
+
+    with write_transaction(conn):
+        conn.executemany(
+            "INSERT INTO prediction_cache VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (clean_desc, model) DO UPDATE SET "
+            "category = excluded.category, confidence = excluded.confidence, "
+            "last_used = excluded.last_used",
+            ((desc, fingerprint, str(cat), float(conf), now)
+             for desc, (cat, conf) in predictions.items()),
+        )
+        conn.execute("DELETE FROM prediction_cache WHERE last_used < ?", (now - STALE_AFTER,))
+
+        (count,) = conn.execute("SELECT entries FROM prediction_cache_size").fetchone()
+        if count > max_entries:
+            conn.execute(
+                "DELETE FROM prediction_cache WHERE rowid IN ("
+                "SELECT rowid FROM prediction_cache ORDER BY last_used LIMIT ?)",
+                (count - max_entries,),
+            )
+
+
+def purge(keep=None, path=CACHE_PATH):
+    """
+    Drop the entries of every model except `keep` (all entries when None),
+    e.g. after retiring old models. Returns the number of entries removed.
+    """
+    conn = get_connection(path)
+    with write_transaction(conn):
+        return conn.execute(
+            "DELETE FROM prediction_cache WHERE model IS NOT ?", (keep,)
+        ).rowcount
+
+
+def record_rows(n):
+    """Count rows classified, so hits/misses can be read as a saving."""
+    with _lock:
+        _stats["rows"] += n
+
+
+def cache_stats():
+    """
+    Return counters since process start (or reset_stats):
+    rows classified, unique descriptions served from cache (hits) and
+    unique descriptions sent to the model (misses).
+    """
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purge the prediction cache.")
+    parser.add_argument("--keep", help="model fingerprint whose entries are kept "
+                                       "(default: the current model's)")
+    parser.add_argument("--all", action="store_true", help="drop every entry")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    args = parser.parse_args(argv)
+
+    keep = None
+    if not args.all:
+        from src.model_registry import model_fingerprint
+
+        try:
+            keep = args.keep or model_fingerprint()
+        except (OSError, ValueError) as e:
+            print("ERROR:", e)
+            return
+    removed = purge(keep, args.cache)
+    print(f"Removed {removed} cached predictions" + (f" (kept model {keep[:12]})" if keep else ""))
+
+
+if __name__ == "__main__":
+    main()
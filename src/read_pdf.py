@@ -1,5 +1,15 @@
-import pdfplumber
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+from src import instrument
+from src.dates import detect_format, parse_dates
+from src.preprocess import parse_amounts
+
+# Below this many pages a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 16
 
 def safe_float(value):
     """
@@ -21,91 +31,247 @@ def safe_float(value):
         return 0.0
 
 
-def read_pdf_bank_statement(pdf_file):
-    """
-    Extracts tables from a PDF bank statement and returns a clean DataFrame.
-    Safe for messy PDFs, blank cells, extra rows, and missing numbers.
-    """
+# Normalize column names (common cases)
+RENAME_MAP = {
+    "narration": "description",
+    "details": "description",
+    "particulars": "description",
+    "transaction details": "description",
+
+    "date": "date",
+    "value date": "date",
+    "txn date": "date",
+
+    "withdrawal amt": "debit",
+    "withdrawal amount": "debit",
+    "withdrawal": "debit",
+
+    "deposit amt": "credit",
+    "deposit amount": "credit",
+    "deposit": "credit",
+
+    "amount": "amount",
+    "amt": "amount",
+}
+
+
+def _header_key(row):
+    return [str(x).strip().lower() for x in row]
+
+
+def extract_page_rows(page):
+    """Return the non-empty table rows of one pdfplumber page."""
+    try:
+        table = page.extract_table()
+    except:
+        table = None
 
-    final_rows = []
+    # skip empty rows
+    return [row for row in table or [] if row and any(str(x).strip() for x in row)]
+
+
+def iter_page_rows(pdf_file):
+    """Yield the table rows of each page, in page order."""
+    import pdfplumber  # loaded only for PDF statements
 
     with pdfplumber.open(pdf_file) as pdf:
         for page in pdf.pages:
-            try:
-                table = page.extract_table()
-            except:
-                table = None
+            rows = extract_page_rows(page)
+            # pdf.pages keeps every Page alive; drop its parsed chars/objects
+            # so memory stays at one page rather than growing with the file
+            page.close()
+            yield rows
 
-            if table:
-                for row in table:
-                    if row and any(str(x).strip() for x in row):  # skip empty rows
-                        final_rows.append(row)
 
-    if not final_rows:
-        raise ValueError("No table found inside PDF. PDF might be scanned or unstructured.")
+def _pdf_source(pdf_file):
+    """Return something picklable each worker can open: a path or the raw bytes."""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return os.fspath(pdf_file)
+    if isinstance(pdf_file, bytes):
+        return pdf_file
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    return pdf_file.read()
+
 
-    # Convert to DataFrame
-    df = pd.DataFrame(final_rows)
+def _open_source(source):
+    import pdfplumber
 
-    # First row = header
-    df.columns = df.iloc[0].astype(str).str.strip().str.lower()
-    df = df.drop(0, axis=0)
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
 
-    # Clean column names
-    df.columns = [str(c).strip().lower() for c in df.columns]
 
-    # Normalize column names (common cases)
-    rename_map = {
-        "narration": "description",
-        "details": "description",
-        "particulars": "description",
-        "transaction details": "description",
+def extract_page_range(source, start, stop):
+    """Worker: open the PDF independently and extract pages [start, stop)."""
+    pages = []
+    with _open_source(source) as pdf:
+        for i in range(start, stop):
+            page = pdf.pages[i]
+            pages.append(extract_page_rows(page))
+            page.close()
+    return pages
 
-        "date": "date",
-        "value date": "date",
-        "txn date": "date",
 
-        "withdrawal amt": "debit",
-        "withdrawal amount": "debit",
-        "withdrawal": "debit",
+def iter_page_rows_parallel(pdf_file, workers=None):
+    """
+    Like iter_page_rows, but shards page ranges across a process pool.
+    Results are yielded in page order. Small PDFs (or workers <= 1) are
+    read sequentially.
+    """
+    workers = workers or os.cpu_count() or 1
+    source = _pdf_source(pdf_file)
 
-        "deposit amt": "credit",
-        "deposit amount": "credit",
-        "deposit": "credit",
+    with _open_source(source) as pdf:
+        n_pages = len(pdf.pages)
 
-        "amount": "amount",
-        "amt": "amount",
-    }
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        yield from iter_page_rows(io.BytesIO(source) if isinstance(source, bytes) else source)
+        return
 
-    df = df.rename(columns={c: rename_map.get(c, c) for c in df.columns})
+    # A few shards per worker keeps the pool busy when pages differ in cost
+    shard = max(1, -(-n_pages // (workers * 4)))
+    starts = list(range(0, n_pages, shard))
+    stops = [min(start + shard, n_pages) for start in starts]
+
+    # Workers get a path, never the bytes: an in-memory upload is written to
+    # one temp file rather than pickled to the pool once per shard
+    spilled = None
+    if isinstance(source, bytes):
+        fd, spilled = tempfile.mkstemp(prefix="taxbridge_", suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        source = spilled
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+            for pages in pool.map(extract_page_range, [source] * len(starts), starts, stops):
+                yield from pages
+    finally:
+        if spilled:
+            os.remove(spilled)
+
+
+def _standard_columns(header):
+    """
+    Map header cells through RENAME_MAP. The first cell to claim a standard
+    name keeps it; later ones (e.g. "value date" after "date") keep their
+    own name, snake-cased, so every standard column is a single Series.
+    """
+    columns = []
+    for cell in header:
+        name = RENAME_MAP.get(cell, cell)
+        if name in columns and name != cell:
+            name = cell.replace(" ", "_")
+        columns.append(name)
+    return columns
+
+
+def normalize_statement_rows(rows, header, start=0):
+    """
+    Build a clean statement DataFrame from raw table rows and the header
+    detected on the first page. `start` offsets the index so chunks can be
+    concatenated without clashing.
+    """
+    width = max([len(header)] + [len(r) for r in rows])
+    df = pd.DataFrame(rows, columns=range(width))
+    df.index = range(start, start + len(df))
+
+    # Clean column names (cells missing from the header read as "none")
+    df.columns = _standard_columns(header + ["none"] * (width - len(header)))
 
     # Fill missing cols
     if "description" not in df.columns:
         df["description"] = ""
 
+    # The column already says which way the money moved, so a Dr/Cr marker
+    # there only restates it: debit/credit cells are read as magnitudes, and
+    # the Dr/Cr sign applies to a single amount column only.
+    if "debit" in df.columns:
+        df["debit"] = parse_amounts(df["debit"]).abs()
+    if "credit" in df.columns:
+        df["credit"] = parse_amounts(df["credit"]).abs()
+
     # Create amount column safely
     if "amount" not in df.columns:
         if "debit" in df.columns and "credit" in df.columns:
-            df["amount"] = df.apply(
-                lambda r: safe_float(r.get("debit")) - safe_float(r.get("credit")),
-                axis=1,
-            )
+            df["amount"] = df["debit"] - df["credit"]
         elif "debit" in df.columns:
-            df["amount"] = df["debit"].apply(safe_float)
+            df["amount"] = df["debit"]
         elif "credit" in df.columns:
-            df["amount"] = df["credit"].apply(safe_float)
+            df["amount"] = df["credit"]
         else:
             df["amount"] = 0.0
     else:
-        df["amount"] = df["amount"].apply(safe_float)
-
-    # Convert debit/credit columns safely
-    if "debit" in df.columns:
-        df["debit"] = df["debit"].apply(safe_float)
-    if "credit" in df.columns:
-        df["credit"] = df["credit"].apply(safe_float)
+        df["amount"] = parse_amounts(df["amount"])
 
     # Clean NA values
     df = df.fillna("")
 
     return df
+
+
+def iter_statement_chunks(page_rows, pages_per_chunk=1):
+    """
+    Turn an iterable of per-page row lists into normalized DataFrame chunks.
+    The header is taken from the first row of the document and reused for
+    continuation pages; header rows repeated on later pages are dropped.
+    Dates are parsed here, in the format detected from the first chunk.
+    """
+    header = None
+    pending = []
+    emitted = 0
+    pages = 0
+    fmt = None  # the statement's date format, detected from its first chunk
+
+    def finish(rows):
+        nonlocal fmt
+        df = normalize_statement_rows(rows, header, start=emitted)
+        if "date" in df.columns:
+            if fmt is None:
+                fmt = detect_format(df["date"])
+            df["date"] = parse_dates(df["date"], fmt)
+        return df
+
+    for rows in page_rows:
+        for row in rows:
+            key = _header_key(row)
+            if header is None:
+                header = key
+            elif key != header:
+                pending.append(row)
+
+        pages += 1
+        if pages % pages_per_chunk == 0 and pending:
+            yield finish(pending)
+            emitted += len(pending)
+            pending = []
+
+    if header is None:
+        raise ValueError("No table found inside PDF. PDF might be scanned or unstructured.")
+
+    if pending or emitted == 0:
+        yield finish(pending)
+
+
+def iter_pdf_bank_statement(pdf_file, pages_per_chunk=1, workers=1):
+    """
+    Stream a PDF bank statement as normalized DataFrame chunks, one per
+    `pages_per_chunk` pages, so memory stays bounded on long statements.
+    workers > 1 (or None for all cores) extracts pages in parallel.
+    """
+    if workers == 1:
+        pages = iter_page_rows(pdf_file)
+    else:
+        pages = iter_page_rows_parallel(pdf_file, workers)
+    # Page extraction happens lazily, while each chunk is produced
+    return instrument.stream("read_pdf.chunk", iter_statement_chunks(pages, pages_per_chunk))
+
+
+@instrument.stage()
+def read_pdf_bank_statement(pdf_file, workers=1):
+    """
+    Extracts tables from a PDF bank statement and returns a clean DataFrame.
+    Safe for messy PDFs, blank cells, extra rows, and missing numbers.
+    Pass workers > 1 (or None for all cores) to parse pages in parallel.
+    """
+    chunks = list(iter_pdf_bank_statement(pdf_file, workers=workers))
+    return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
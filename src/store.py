@@ -0,0 +1,54 @@
+"""
+Where classified transactions are saved: the SQLite database (src.db, the
+default) or the Parquet store (src.parquet_store). Both modules have the
+same save_transaction_chunks and *_summary functions, so callers pick a
+backend by name and pass None for its default location:
+
+    backend = store.get_store("parquet")
+    backend.save_transaction_chunks(chunks, store.default_path("parquet"))
+
+The name comes from the caller (e.g. `python -m src.batch --store parquet`),
+else the TAXBRIDGE_STORE environment variable (e.g. for the app), else
+"sqlite". Backends are imported on first use.
+"""
+import importlib
+import os
+
+# name -> (module, its default path constant, its initializer)
+STORES = {
+    "sqlite": ("src.db", "DB_PATH", "init_db"),
+    "parquet": ("src.parquet_store", "STORE_PATH", "init_store"),
+}
+DEFAULT_STORE = "sqlite"
+STORE_ENV = "TAXBRIDGE_STORE"
+
+
+def store_name(name=None):
+    """The backend name to use: `name`, else $TAXBRIDGE_STORE, else sqlite."""
+    name = (name or os.environ.get(STORE_ENV) or DEFAULT_STORE).strip().lower()
+    if name not in STORES:
+        raise ValueError(f"Unknown transaction store {name!r}; use one of: {', '.join(STORES)}")
+    return name
+
+
+def get_store(name=None):
+    """The backend module (src.db or src.parquet_store)."""
+    return importlib.import_module(STORES[store_name(name)][0])
+
+
+def default_path(name=None):
+    """The backend's default database file or store directory."""
+    module, path, _ = STORES[store_name(name)]
+    return getattr(importlib.import_module(module), path)
+
+
+def init_store(name=None, path=None):
+    """
+    Create the store (and migrate a database) ahead of the first write, so
+    a missing dependency or unwritable location fails before any work.
+    Returns the resolved path.
+    """
+    module, _, init = STORES[store_name(name)]
+    path = path or default_path(name)
+    getattr(importlib.import_module(module), init)(path)
+    return path
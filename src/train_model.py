@@ -1,43 +1,170 @@
+import argparse
+import os
+import time
+
+import numpy as np
 import pandas as pd
 import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
-from src.preprocess import prepare_dataframe
+from src.preprocess import detect_date_format, prepare_dataframe
+from src.fast_predict import export_artifact
+from src.merchants import MERCHANT_INDEX_PATH, build_index, load_index, save_index
+from src.model_registry import COMPILED_MODEL_PATH, MODEL_PATH
 
-def main():
-    print("Loading training data...")
-    try:
-        df = pd.read_csv("data/training.csv")
-        print("Data loaded. Rows:", len(df))
-    except Exception as e:
-        print("ERROR loading data:", e)
-        return
+TRAINING_PATH = "data/training.csv"
 
-    df = prepare_dataframe(df)
-
-    if "category" not in df.columns:
-        print("ERROR: 'category' column missing in training.csv")
-        return
-
-    if df.empty:
-        print("ERROR: training.csv is empty or not loaded correctly")
-        return
+# Rows read per partial_fit step in incremental mode
+TRAIN_CHUNK_ROWS = 50_000
+EPOCHS = 5
 
-    X = df["clean_desc"]
-    y = df["category"]
 
-    print("Training model...")
-    pipeline = Pipeline([
+def build_pipeline():
+    """Full-refit model: TF-IDF vocabulary + logistic regression."""
+    return Pipeline([
         ("tfidf", TfidfVectorizer()),
         ("model", LogisticRegression(max_iter=1000))
     ])
 
-    pipeline.fit(X, y)
-    print("Training complete.")
 
-    joblib.dump(pipeline, "models/model.joblib")
-    print("Model saved to models/model.joblib")
+def build_incremental_pipeline():
+    """
+    Out-of-core model. HashingVectorizer needs no fitted vocabulary, so any
+    chunk can be transformed on its own; SGDClassifier learns via
+    partial_fit. log_loss keeps predict_proba available.
+    """
+    return Pipeline([
+        ("hash", HashingVectorizer(n_features=2 ** 18, alternate_sign=False)),
+        ("model", SGDClassifier(loss="log_loss", alpha=1e-6, random_state=0)),
+    ])
+
+
+def is_incremental(pipeline):
+    return isinstance(pipeline, Pipeline) and isinstance(pipeline[-1], SGDClassifier)
+
+
+def _category_column(path):
+    header = pd.read_csv(path, nrows=0).columns
+    for col in header:
+        if col.lower().strip() == "category":
+            return col
+    raise ValueError(f"'category' column missing in {path}")
+
+
+def collect_classes(path, chunk_rows=TRAIN_CHUNK_ROWS):
+    """First pass: the sorted label set, reading only the category column."""
+    col = _category_column(path)
+    labels = set()
+    for chunk in pd.read_csv(path, usecols=[col], chunksize=chunk_rows):
+        labels.update(chunk[col].dropna().astype(str))
+    return np.array(sorted(labels))
+
+
+def iter_labelled_chunks(path, chunk_rows=TRAIN_CHUNK_ROWS):
+    """Yield (clean_desc, category) Series pairs, one CSV chunk at a time."""
+    date_format = None
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        if date_format is None:
+            date_format = detect_date_format(chunk)
+        chunk = prepare_dataframe(chunk, date_format)
+        chunk = chunk[chunk["category"].notna()]
+        if not chunk.empty:
+            yield chunk["clean_desc"], chunk["category"].astype(str)
+
+
+def train_incremental(path, pipeline=None, chunk_rows=TRAIN_CHUNK_ROWS, epochs=EPOCHS):
+    """
+    Stream `path` through partial_fit. Memory is bounded by chunk_rows, not
+    by the size of the file. Passing an already trained incremental
+    pipeline continues training it (warm start) on the rows in `path`.
+    """
+    classes = collect_classes(path, chunk_rows)
+    if pipeline is None:
+        pipeline = build_incremental_pipeline()
+    else:
+        known = getattr(pipeline[-1], "classes_", None)
+        if known is not None:
+            unseen = sorted(set(classes) - set(known))
+            if unseen:
+                raise ValueError(
+                    f"New categories {unseen} are not in the deployed model; "
+                    "retrain from scratch with --incremental."
+                )
+            classes = known
+
+    vectorizer, clf = pipeline[0], pipeline[-1]
+    for epoch in range(epochs):
+        for clean_desc, category in iter_labelled_chunks(path, chunk_rows):
+            # partial_fit makes a single ordered pass; shuffle so label-sorted
+            # files don't bias the last updates towards one category
+            order = np.random.default_rng(epoch).permutation(len(category))
+            X = vectorizer.transform(clean_desc.iloc[order])
+            clf.partial_fit(X, category.iloc[order], classes=classes)
+
+    return pipeline
+
+
+def train_full(path):
+    """Load the whole CSV and refit the TF-IDF pipeline from scratch."""
+    df = prepare_dataframe(pd.read_csv(path))
+    if "category" not in df.columns:
+        raise ValueError(f"'category' column missing in {path}")
+    if df.empty:
+        raise ValueError(f"{path} is empty or not loaded correctly")
+
+    pipeline = build_pipeline()
+    pipeline.fit(df["clean_desc"], df["category"])
+    return pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the expense classifier.")
+    parser.add_argument("--data", default=TRAINING_PATH, help="labelled CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stream the CSV in chunks into a hashing + SGD model")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="continue training the deployed incremental model on --data only")
+    parser.add_argument("--chunk-size", type=int, default=TRAIN_CHUNK_ROWS)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    print(f"Training model from {args.data}...")
+    try:
+        if args.warm_start:
+            pipeline = joblib.load(MODEL_PATH)
+            if not is_incremental(pipeline):
+                print("ERROR: the deployed model is a full refit; train with --incremental first")
+                return
+            pipeline = train_incremental(args.data, pipeline, args.chunk_size, args.epochs)
+        elif args.incremental:
+            pipeline = train_incremental(args.data, None, args.chunk_size, args.epochs)
+        else:
+            pipeline = train_full(args.data)
+    except (OSError, ValueError) as e:
+        print("ERROR:", e)
+        return
+    print(f"Training complete in {time.perf_counter() - start:.2f}s.")
+
+    joblib.dump(pipeline, MODEL_PATH)
+    print(f"Model saved to {MODEL_PATH}")
+
+    # Compiled copy for NumPy-only inference; hashing models have no
+    # vocabulary to export, so drop any stale one instead.
+    if is_incremental(pipeline):
+        if os.path.exists(COMPILED_MODEL_PATH):
+            os.remove(COMPILED_MODEL_PATH)
+    else:
+        export_artifact(pipeline, COMPILED_MODEL_PATH)
+        print(f"Compiled model saved to {COMPILED_MODEL_PATH}")
+
+        # Known-merchant index from the same labels, keeping confirmed entries.
+        # Incremental runs stream data too large to index in one go; build
+        # their index with `python -m src.merchants`.
+        index = build_index(pd.read_csv(args.data), previous=load_index())
+        save_index(index)
+        print(f"Merchant index ({len(index['merchants'])} merchants) saved to {MERCHANT_INDEX_PATH}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import db, model_registry, prediction_cache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh SQLite database path; connections are closed afterwards."""
+    yield str(tmp_path / "taxbridge.db")
+    db.close_connections()
+
+
+@pytest.fixture
+def classified():
+    """A small classified statement, as classify_dataframe returns it."""
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2024-04-01", "2024-04-15", "2024-05-02", "2024-05-02"]),
+        "description": ["SWIGGY ORDER", "UBER RIDE", "TATA POWER BILL", "TATA POWER BILL"],
+        "amount": [450.0, 320.0, 1800.0, 1800.0],
+        "predicted_category": ["food", "travel", "utilities", "utilities"],
+        "deductible": [0, 1, 1, 1],
+        "gst_rate": [5, 0, 18, 18],
+        "gst_input": [22.5, 0.0, 324.0, 324.0],
+    })
+
+
+@pytest.fixture(scope="session")
+def trained_models(tmp_path_factory):
+    """models/ trained once per session on labelled synthetic statements."""
+    from benchmarks.synthetic import make_statement
+    from src import train_model
+
+    root = tmp_path_factory.mktemp("trained")
+    data = root / "training.csv"
+    make_statement(2000, seed=1, labels=True).to_csv(data, index=False)
+    (root / "models").mkdir()
+
+    cwd = os.getcwd()
+    os.chdir(root)  # train_model writes its artifacts relative to the cwd
+    try:
+        train_model.main(["--data", str(data)])
+    finally:
+        os.chdir(cwd)
+    return root / "models"
+
+
+@pytest.fixture
+def workspace(tmp_path, trained_models, monkeypatch):
+    """
+    A working directory holding a copy of the trained models, so the
+    default model, merchant index, database and cache paths resolve there.
+    """
+    shutil.copytree(trained_models, tmp_path / "models")
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    model_registry.clear()
+    prediction_cache.close_connections()
+    db.close_connections()
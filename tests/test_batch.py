@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic import make_statement
+from src import batch, db, parquet_store
+
+
+def _write_statements(directory, count):
+    directory.mkdir()
+    for i in range(count):
+        make_statement(50, seed=i).to_csv(directory / f"statement_{i}.csv", index=False)
+    return directory
+
+
+def _progress(directory):
+    with open(directory / batch.PROGRESS_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_run_then_resume(workspace, db_path):
+    statements = _write_statements(workspace / "statements", 3)
+
+    totals = batch.run(str(statements), workers=2, db_path=db_path)
+    assert totals["files"] == 3 and totals["failed"] == 0
+    assert totals["inserted"] == 150
+    assert {r["status"] for r in _progress(statements)} == {"done"}
+
+    # Nothing left to do on a second run
+    assert batch.run(str(statements), workers=2, db_path=db_path)["files"] == 0
+
+    # A new file and an edited one are picked up; the rest are not reread
+    make_statement(20, seed=10).to_csv(statements / "statement_new.csv", index=False)
+    make_statement(60, seed=0).to_csv(statements / "statement_0.csv", index=False)
+    totals = batch.run(str(statements), workers=2, db_path=db_path)
+    assert totals["files"] == 2
+    assert totals["rows"] == 80
+    assert len(_progress(statements)) == 5
+
+
+def test_failed_files_are_retried(workspace, db_path):
+    statements = _write_statements(workspace / "statements", 1)
+    (statements / "broken.xlsx").write_bytes(b"not a workbook")
+
+    totals = batch.run(str(statements), workers=1, db_path=db_path)
+    assert totals["files"] == 1 and totals["failed"] == 1
+    failed = [r for r in _progress(statements) if r["status"] == "failed"]
+    assert [r["file"].endswith("broken.xlsx") for r in failed] == [True]
+
+    # Only the failed file is attempted again
+    totals = batch.run(str(statements), workers=1, db_path=db_path)
+    assert totals["files"] == 0 and totals["failed"] == 1
+
+
+def test_torn_progress_line_is_ignored(tmp_path):
+    progress = tmp_path / "progress.jsonl"
+    progress.write_text('{"file": "a.csv", "status": "done", "size": 1, "mtime": 1}\n{"file": "b.c')
+    assert list(batch.load_progress(str(progress))) == ["a.csv"]
+
+
+def test_missing_model_exits_with_error(tmp_path, monkeypatch, capsys):
+    statements = _write_statements(tmp_path / "statements", 1)
+    monkeypatch.chdir(tmp_path)
+
+    assert batch.main([str(statements), "--db", str(tmp_path / "t.db")]) == 1
+    assert "no trained model" in capsys.readouterr().out
+    db.close_connections()
+
+
+def test_parquet_store_with_parallel_writers(workspace):
+    pytest.importorskip("pyarrow")
+    statements = _write_statements(workspace / "statements", 1)
+    # The same statement twice: whichever worker saves second skips every row
+    (statements / "copy.csv").write_bytes((statements / "statement_0.csv").read_bytes())
+    store_path = str(workspace / "store")
+
+    assert batch.main([str(statements), "--store", "parquet", "--db", store_path,
+                       "--workers", "2"]) == 0
+    assert parquet_store.summary_totals(path=store_path)["txn_count"] == 50
+    assert {r["store"] for r in _progress(statements)} == {"parquet"}
+
+    # Done for Parquet is not done for SQLite
+    totals = batch.run(str(statements), workers=1, db_path=str(workspace / "t.db"))
+    assert totals["files"] == 2 and totals["skipped"] == 50
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from src.dates import EXCEL_FORMAT, detect_format, parse_dates
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["01/02/2024", "13/04/2024", "30/04/2024"], "%d/%m/%Y"),
+    (["01-02-24", "13-04-24"], "%d-%m-%y"),
+    (["05 Apr 2024", "13 Apr 2024"], "%d %b %Y"),
+    (["05-Apr-2024", "13-Apr-2024"], "%d-%b-%Y"),
+    (["2024-04-05", "2024-04-13"], "%Y-%m-%d"),
+    (["45383", "45390"], EXCEL_FORMAT),
+])
+def test_detect_format(values, expected):
+    assert detect_format(pd.Series(values)) == expected
+
+
+def test_detect_format_without_dates():
+    assert detect_format(pd.Series(["", None, "opening balance"])) is None
+    assert detect_format(pd.Series(pd.to_datetime(["2024-04-01"]))) is None
+
+
+def test_ambiguous_dates_are_day_first():
+    # 01/02 is 1 February: Indian statements never print month first
+    parsed = parse_dates(pd.Series(["01/02/2024", "13/04/2024"]))
+    assert parsed.tolist() == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-04-13")]
+
+
+def test_parse_with_detected_format_and_fallback():
+    values = pd.Series(["05/04/2024", "2024-04-06", "not a date", "", None, "12345.5"])
+    parsed = parse_dates(values, "%d/%m/%Y")
+    assert parsed.iloc[0] == pd.Timestamp("2024-04-05")
+    assert parsed.iloc[1] == pd.Timestamp("2024-04-06")  # ISO falls back year-first
+    assert parsed.iloc[2:].isna().all()
+
+
+def test_excel_serials():
+    parsed = parse_dates(pd.Series([45383, 45390]))
+    assert parsed.tolist() == [pd.Timestamp("2024-04-01"), pd.Timestamp("2024-04-08")]
+
+
+def test_parse_keeps_index_and_datetimes():
+    values = pd.Series(["05/04/2024", "05/04/2024"], index=[10, 11])
+    parsed = parse_dates(values)
+    assert list(parsed.index) == [10, 11]
+
+    already = pd.Series(pd.to_datetime(["2024-04-05"]))
+    assert parse_dates(already) is already
+
+
+def test_year_first_slashes():
+    values = pd.Series(["2024/04/01", "2024/04/13"])
+    expected = [pd.Timestamp("2024-04-01"), pd.Timestamp("2024-04-13")]
+
+    assert detect_format(values) == "%Y/%m/%d"
+    assert parse_dates(values).tolist() == expected
+    # A day-first format from an earlier chunk falls back year-first
+    assert parse_dates(values, "%d/%m/%Y").tolist() == expected
+
+
+def test_day_first_with_minutes():
+    values = pd.Series(["05/04/2024 10:30", "13/04/2024 18:05"])
+    assert detect_format(values) == "%d/%m/%Y %H:%M"
+    assert parse_dates(values).dt.day.tolist() == [5, 13]
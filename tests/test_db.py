@@ -0,0 +1,153 @@
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from src import db
+
+
+def _columns(path):
+    with sqlite3.connect(path) as conn:
+        return {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+
+
+def _user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _stored_totals(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*), SUM(amount), SUM(gst_input) FROM transactions"
+        ).fetchone()
+
+
+# ----------------------------
+# Migrations
+# ----------------------------
+def test_migrate_fresh_database(db_path):
+    db.init_db(db_path)
+    assert _user_version(db_path) == len(db.MIGRATIONS)
+    assert {"fingerprint", "gst_rate", "gst_input", "month"} <= _columns(db_path)
+
+
+def test_migrate_heals_schema_ahead_of_version(db_path):
+    # What the old migrate race left behind: every column, user_version 2
+    db.init_db(db_path)
+    db.close_connections()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA user_version = 2")
+
+    db.init_db(db_path)
+    assert _user_version(db_path) == len(db.MIGRATIONS)
+
+
+def _open_concurrently(path, barrier, errors):
+    barrier.wait()
+    try:
+        db.init_db(path)
+    except Exception as e:
+        errors.put(f"{type(e).__name__}: {e}")
+
+
+def test_concurrent_first_open(db_path):
+    try:
+        ctx = multiprocessing.get_context("fork")
+    except ValueError:
+        pytest.skip("needs the fork start method")
+
+    processes = 6
+    barrier = ctx.Barrier(processes)
+    errors = ctx.Queue()
+    workers = [
+        ctx.Process(target=_open_concurrently, args=(db_path, barrier, errors))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    assert failures == []
+    assert [w.exitcode for w in workers] == [0] * processes
+    assert _user_version(db_path) == len(db.MIGRATIONS)
+
+
+# ----------------------------
+# Fingerprint upserts
+# ----------------------------
+def test_save_is_idempotent(db_path, classified):
+    first = db.save_transactions(classified, db_path)
+    again = db.save_transactions(classified, db_path)
+
+    assert first == {"inserted": 4, "updated": 0, "skipped": 0}
+    assert again == {"inserted": 0, "updated": 0, "skipped": 4}
+    # Same-day repeats get distinct ordinals instead of collapsing
+    assert _stored_totals(db_path)[0] == 4
+
+
+def test_save_updates_changed_classification(db_path, classified):
+    db.save_transactions(classified, db_path)
+    relabelled = classified.copy()
+    relabelled.loc[1, "predicted_category"] = "office"
+
+    counts = db.save_transactions(relabelled, db_path)
+    assert counts == {"inserted": 0, "updated": 1, "skipped": 3}
+    with sqlite3.connect(db_path) as conn:
+        categories = [r[0] for r in conn.execute(
+            "SELECT predicted_category FROM transactions ORDER BY id")]
+    assert categories == ["food", "office", "utilities", "utilities"]
+
+
+def test_chunks_share_occurrence_ordinals(db_path, classified):
+    # The same-day repeat split across two chunks still counts as two rows
+    chunks = [classified.iloc[:3], classified.iloc[3:]]
+    totals = db.save_transaction_chunks(chunks, db_path)
+    assert totals["inserted"] == 4
+
+
+# ----------------------------
+# Rollups
+# ----------------------------
+def test_rollup_totals_match_transactions(db_path, classified):
+    db.save_transactions(classified, db_path)
+    totals = db.summary_totals(path=db_path)
+
+    count, amount, gst = _stored_totals(db_path)
+    assert totals["txn_count"] == count == 4
+    assert totals["total_spend"] == pytest.approx(amount)
+    assert totals["gst_input"] == pytest.approx(gst)
+
+    monthly = db.monthly_summary(path=db_path).set_index("month")
+    assert monthly["txn_count"].to_dict() == {"2024-04": 2, "2024-05": 2}
+    assert monthly.loc["2024-05", "total_spend"] == pytest.approx(3600.0)
+
+
+def test_rollups_follow_updates(db_path, classified):
+    db.save_transactions(classified, db_path)
+    relabelled = classified.copy()
+    relabelled.loc[0, ["predicted_category", "gst_rate", "gst_input"]] = ["travel", 0, 0.0]
+    db.save_transactions(relabelled, db_path)
+
+    by_category = db.category_summary(path=db_path).set_index("category")
+    assert "food" not in by_category.index
+    assert by_category.loc["travel", "txn_count"] == 2
+    assert db.summary_totals(path=db_path)["gst_input"] == pytest.approx(648.0)
+
+    # The incrementally maintained rollup equals a rebuild from scratch
+    before = db.monthly_summary(path=db_path)
+    conn = db.get_connection(db_path)
+    with db.write_transaction(conn):
+        db.rebuild_rollups(conn)
+    assert db.monthly_summary(path=db_path).equals(before)
+
+
+def test_summary_month_range(db_path, classified):
+    db.save_transactions(classified, db_path)
+    april = db.summary_totals("2024-04", "2024-04", path=db_path)
+    assert april["txn_count"] == 2
+    assert april["total_spend"] == pytest.approx(770.0)
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from src import db
+from src.export import export_file, export_to_tempfile, export_transactions, write_csv
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2024-04-01", None, "2024-05-02"]),
+        "description": ["SWIGGY ORDER", "UBER RIDE", None],
+        "amount": [450.0, 320.5, float("nan")],
+        "predicted_category": pd.Categorical(["food", "travel", "food"]),
+        "gst_rate": [5, 0, 5],
+    })
+
+
+def test_chunked_csv_matches_to_csv(tmp_path, frame):
+    path = write_csv(frame, str(tmp_path / "out.csv"), chunk_rows=2)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == frame.to_csv(index=False)
+
+
+def test_csv_from_chunk_iterable(tmp_path, frame):
+    chunks = (frame.iloc[i:i + 1] for i in range(len(frame)))
+    path = write_csv(chunks, str(tmp_path / "out.csv"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == frame.to_csv(index=False)
+
+
+def test_xlsx_round_trip(tmp_path, frame):
+    pytest.importorskip("openpyxl")
+    path = export_file(frame, "xlsx", str(tmp_path / "out.xlsx"), chunk_rows=2)
+
+    back = pd.read_excel(path)
+    assert list(back.columns) == list(frame.columns)
+    assert back["amount"].tolist()[:2] == [450.0, 320.5]
+    assert pd.isna(back["amount"].iloc[2]) and pd.isna(back["date"].iloc[1])
+    assert back["predicted_category"].tolist() == ["food", "travel", "food"]
+
+
+def test_tempfile_is_removed_on_error(tmp_path, monkeypatch, frame):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+
+    def failing_chunks():
+        yield frame
+        raise RuntimeError("source failed")
+
+    with pytest.raises(ValueError):
+        export_to_tempfile(frame, "json")
+    with pytest.raises(RuntimeError):
+        export_to_tempfile(failing_chunks(), "csv")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_transactions_from_sqlite(tmp_path, db_path, classified):
+    db.save_transactions(classified, db_path)
+    path = export_transactions(str(tmp_path / "out.csv"), path=db_path, chunk_rows=3)
+
+    exported = pd.read_csv(path)
+    assert len(exported) == len(classified)
+    assert exported["amount"].tolist() == classified["amount"].tolist()
+    assert exported["gst_input"].sum() == pytest.approx(classified["gst_input"].sum())
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("reportlab")
+pdfplumber = pytest.importorskip("pdfplumber")
+
+from benchmarks.bench_db import make_frame
+from src.export_pdf import DETAIL_HEADER, _detail_columns, generate_pdf_report
+
+HEADER_LINE = " ".join(DETAIL_HEADER)
+
+
+def _pages(path):
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text().splitlines() for page in pdf.pages]
+
+
+def test_every_row_once_with_a_header_per_page(tmp_path):
+    df = make_frame(150)
+    pages = _pages(generate_pdf_report(df, str(tmp_path / "report.pdf"), chunk_rows=40))
+
+    detail = [line for page in pages for line in page if line[:4].isdigit() and line[4] == "-"]
+    assert len(detail) == len(df)
+    for page in pages:
+        assert page.count(HEADER_LINE) >= 1
+        rows = [line for line in page if line[:4].isdigit() and line[4] == "-"]
+        assert len(rows) <= 40 * page.count(HEADER_LINE)
+
+
+def test_summary_only_and_by_month(tmp_path):
+    df = make_frame(60)
+    pages = _pages(generate_pdf_report(df, str(tmp_path / "a.pdf"), summary_only=True))
+    assert not any(HEADER_LINE in page for page in pages)
+
+    pages = _pages(generate_pdf_report(df, str(tmp_path / "b.pdf"), by_month=True))
+    text = [line for page in pages for line in page]
+    months = sorted(df["date"].dt.strftime("%Y-%m").unique())
+    assert [line for line in text if line in months] == months
+    assert text.count(HEADER_LINE) >= len(months)
+
+
+def test_detail_cells_match_column_formatting():
+    df = make_frame(20)
+    df.loc[3, "date"] = pd.NaT
+    columns = _detail_columns(df)
+
+    assert columns[0][3] == ""
+    assert columns[0][0] == df["date"].iloc[0].strftime("%Y-%m-%d")
+    assert columns[2] == ("₹ " + df["amount"].astype(str)).tolist()
+    assert columns[3] == df["predicted_category"].astype(str).str.capitalize().tolist()
+    assert columns[5] == ("₹ " + df["gst_input"].astype(str)).tolist()
@@ -0,0 +1,34 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_statement
+from src.fast_predict import export_artifact, load_model
+from src.preprocess import clean_text_series, normalize_columns
+
+
+def _docs():
+    df = normalize_columns(make_statement(500, seed=3))
+    docs = clean_text_series(df["description"]).tolist()
+    # Unseen words, an empty string and repeated terms
+    return docs + ["", "completely unseen words", "swiggy swiggy swiggy order"]
+
+
+def test_compiled_model_matches_pipeline(trained_models):
+    pipeline = joblib.load(trained_models / "model.joblib")
+    compiled = load_model(str(trained_models / "model.npz"))
+    docs = _docs()
+
+    assert list(compiled.classes_) == list(pipeline.classes_)
+    np.testing.assert_allclose(compiled.predict_proba(docs), pipeline.predict_proba(docs),
+                               rtol=1e-6, atol=1e-9)
+    assert list(compiled.predict(docs)) == list(pipeline.predict(docs))
+
+
+def test_export_round_trip(trained_models, tmp_path):
+    pipeline = joblib.load(trained_models / "model.joblib")
+    path = str(tmp_path / "model.npz")
+    export_artifact(pipeline, path)
+
+    docs = pd.Series(_docs())
+    assert list(load_model(path).predict(docs)) == list(pipeline.predict(docs))
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.predict import detect_gst, detect_gst_series, gst_input
+
+DESCRIPTIONS = [
+    "swiggy order", "hp printer ink", "google workspace subscription",
+    "zomato office lunch",  # food and office: the first rate in the table wins
+    "uber ride", "", None, 42, "Canva Pro", "wifi bill",
+]
+
+
+def test_detect_gst_series_matches_row_wise():
+    descriptions = pd.Series(DESCRIPTIONS, index=range(10, 20))
+    rates = detect_gst_series(descriptions)
+
+    assert rates.tolist() == [detect_gst(d) for d in DESCRIPTIONS]
+    assert list(rates.index) == list(descriptions.index)
+
+
+def test_gst_input_matches_row_wise_round():
+    rng = np.random.default_rng(0)
+    # 2-decimal amounts include half-paisa ties that np.round gets wrong
+    amount = np.round(rng.uniform(0, 100_000, 20_000), 2)
+    rate = rng.choice([0, 5, 12, 18], size=amount.size)
+
+    # The row-wise apply saw Python floats, so this is Python's round()
+    expected = [
+        round(a * r / 100, 2) if r > 0 else 0.0
+        for a, r in zip(amount.tolist(), rate.tolist())
+    ]
+    assert gst_input(amount, rate).tolist() == expected
+
+
+def test_gst_input_exact_ties():
+    assert gst_input([0.1, 10.1, 2.5], [5, 5, 18]).tolist() == [
+        round(0.1 * 5 / 100, 2), round(10.1 * 5 / 100, 2), round(2.5 * 18 / 100, 2),
+    ]
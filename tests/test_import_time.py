@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from benchmarks.check_import_time import BUDGET_MS, HEAVY, MODULES, best_of
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def baseline_ms():
+    return best_of("pandas", 3)["pandas"] / 1000
+
+
+@pytest.fixture(autouse=True)
+def _repo_root(monkeypatch):
+    # `python -c "import src..."` resolves src from the working directory
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_budget(module, baseline_ms):
+    profile = best_of(module, 3)
+
+    heavy = sorted({name.split(".")[0] for name in profile} & set(HEAVY))
+    assert heavy == [], f"{module} imports {', '.join(heavy)} at import time"
+    assert profile[module] / 1000 - baseline_ms <= BUDGET_MS
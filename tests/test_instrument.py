@@ -0,0 +1,100 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from src import instrument
+
+
+@pytest.fixture(autouse=True)
+def _disabled():
+    yield
+    instrument.disable()
+
+
+@instrument.stage("double")
+def double(df):
+    return pd.concat([df, df])
+
+
+def test_nothing_recorded_without_sinks():
+    sink = instrument.MemorySink()
+    double(pd.DataFrame({"a": [1]}))
+    with instrument.measure("block") as record:
+        assert record == {}
+    assert not instrument.enabled() and list(sink.records) == []
+
+
+def test_stage_records_rows_and_nesting():
+    sink = instrument.MemorySink()
+    with instrument.recording(sink):
+        with instrument.measure("outer", rows=3):
+            double(pd.DataFrame({"a": [1, 2, 3]}))
+
+    inner, outer = sink.records
+    assert (inner["stage"], inner["rows"], inner["depth"]) == ("double", 6, 1)
+    assert (outer["stage"], outer["rows"], outer["depth"]) == ("outer", 3, 0)
+    assert outer["wall_s"] >= inner["wall_s"] >= 0
+    assert outer["peak_mb"] is None and outer["error"] is None
+
+
+def test_errors_are_recorded_and_raised():
+    sink = instrument.MemorySink()
+    with instrument.recording(sink), pytest.raises(KeyError):
+        with instrument.measure("lookup"):
+            {}["missing"]
+    assert sink.records[0]["error"] == "KeyError"
+
+
+def test_recording_is_scoped_to_the_context():
+    process, scoped = instrument.MemorySink(), instrument.MemorySink()
+    instrument.enable(process)
+
+    def work():
+        with instrument.measure("thread"):
+            pass
+
+    with instrument.recording(scoped):
+        with instrument.measure("scoped"):
+            pass
+        # A new thread starts with an empty context: process-wide sinks
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    with instrument.measure("process"):
+        pass
+
+    assert [r["stage"] for r in scoped.records] == ["scoped"]
+    assert [r["stage"] for r in process.records] == ["thread", "process"]
+
+
+def test_memory_is_measured_for_process_sinks():
+    sink = instrument.MemorySink()
+    instrument.enable(sink, memory=True)
+    with instrument.measure("alloc"):
+        data = bytearray(5_000_000)
+    del data
+    assert sink.records[0]["peak_mb"] >= 4.9
+
+
+def test_stream_times_each_chunk():
+    sink = instrument.MemorySink()
+    chunks = [pd.DataFrame({"a": range(n)}) for n in (3, 2)]
+    with instrument.recording(sink):
+        assert [len(c) for c in instrument.stream("read", chunks)] == [3, 2]
+    assert [(r["stage"], r["rows"]) for r in sink.records] == [("read", 3), ("read", 2)]
+
+
+def test_jsonl_sink_and_failing_sinks(tmp_path):
+    path = tmp_path / "stages.jsonl"
+
+    def broken(record):
+        raise RuntimeError("sink down")
+
+    with instrument.recording(broken, instrument.JsonlSink(str(path))):
+        with instrument.measure("save", rows=10):
+            pass
+
+    record = json.loads(path.read_text())
+    assert record["stage"] == "save" and record["rows"] == 10
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_statement
+from src import jobs, merchants
+
+
+def _csv(rows, seed):
+    return make_statement(rows, seed=seed).to_csv(index=False).encode()
+
+
+def _wait(*submitted, timeout=60):
+    deadline = time.time() + timeout
+    while any(job.active for job in submitted):
+        assert time.time() < deadline, "jobs did not finish"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def queue(workspace):
+    queue = jobs.JobQueue(max_workers=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_saves_and_reports_progress(queue, db_path):
+    content = _csv(120, seed=1)
+    job = queue.submit("alice", "statement.csv", content, path=db_path)
+    _wait(job)
+
+    assert job.status == "done" and job.error is None
+    assert job.rows == 120 and job.progress() == 1.0
+    assert job.counts["inserted"] == 120
+    assert len(job.result()) == 120
+
+
+def test_finished_jobs_are_reused(queue, db_path):
+    content = _csv(50, seed=2)
+    digest = hashlib.sha256(content).hexdigest()
+    first = queue.submit("alice", "a.csv", content, digest, path=db_path)
+    _wait(first)
+
+    # Another session uploading the same bytes gets the saved job back
+    assert queue.submit("bob", "b.csv", content, digest, path=db_path) is first
+
+    # ...but not for another database, or once the merchant index changed
+    assert queue.submit("bob", "b.csv", content, digest, path=db_path + "2") is not first
+    merchants.confirm_labels(pd.DataFrame({"description": ["UBER RIDE 1"], "category": ["office"]}))
+    again = queue.submit("bob", "b.csv", content, digest, path=db_path)
+    assert again is not first
+    _wait(again)
+    assert again.counts["inserted"] == 0
+
+
+def test_failed_jobs_are_not_reused(queue, db_path):
+    content = b"not,a\nstatement"
+    digest = hashlib.sha256(content).hexdigest()
+    job = queue.submit("alice", "broken.xlsx", content, digest, path=db_path)
+    _wait(job)
+
+    assert job.status == "failed" and job.error.startswith(("InvalidFileException", "BadZipFile"))
+    assert job.progress() == 1.0 and job.result().empty
+    retry = queue.submit("alice", "broken.xlsx", content, digest, path=db_path)
+    assert retry is not job
+    _wait(retry)
+    assert queue.stats() == {"running": 0, "queued": 0, "max_workers": 2}
+
+
+def test_owners_take_turns(workspace, monkeypatch, db_path):
+    queue = jobs.JobQueue(max_workers=1)
+    order = []
+    gate = threading.Event()
+
+    def run(job):
+        gate.wait(10)
+        order.append(job.name)
+        job.status = "done"
+    monkeypatch.setattr(jobs.Job, "run", run)
+
+    submitted = [queue.submit(owner, name, b"", path=db_path)
+                 for owner, name in [("alice", "a1"), ("alice", "a2"), ("alice", "a3"),
+                                     ("bob", "b1")]]
+    assert queue.stats()["queued"] == 3
+    gate.set()
+    _wait(*submitted)
+    queue.shutdown()
+
+    # a1 starts at once; then the queued owners alternate, so bob's only
+    # file does not wait behind all of alice's
+    assert order == ["a1", "a2", "b1", "a3"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import merchants
+
+
+@pytest.mark.parametrize("narration, key", [
+    ("UPI/412345678901/SWIGGY/swiggy@ybl/Payment", "swiggy"),
+    ("NEFT/HDFCN52024012512/TATA POWER", "tata power"),
+    ("IMPS/P2M/412345678901/ZOMATO", "zomato"),
+    ("POS 4111XXXXXX HP PETROL PUMP", "hp petrol pump"),
+    ("UBER RIDE 34432", "uber ride"),
+])
+def test_merchant_keys(narration, key):
+    assert merchants.merchant_keys([narration]).tolist() == [key]
+
+
+def test_merchant_keys_missing_narrations():
+    keys = merchants.merchant_keys(pd.Series(["UBER RIDE 1", None, ""], index=[5, 6, 7]))
+    assert keys.tolist() == ["uber ride", "", ""]
+    assert list(keys.index) == [5, 6, 7]
+
+
+@pytest.fixture
+def training():
+    return pd.DataFrame({
+        "description": ["UBER RIDE 1", "UBER RIDE 2", "UBER RIDE 3",
+                        "UPI/1/SWIGGY/a@ybl", "UPI/2/SWIGGY/a@ybl",
+                        "MISC 1", "MISC 2", "MISC 3", "MISC 4"],
+        "category": ["travel"] * 3 + ["food"] * 2 + ["office", "office", "travel", "food"],
+    })
+
+
+def test_build_index_support_and_purity(training):
+    index = merchants.build_index(training)
+    entries = index["merchants"]
+
+    assert entries["uber ride"]["category"] == "travel"
+    assert entries["uber ride"]["support"] == 3
+    assert "swiggy" not in entries  # below MIN_SUPPORT
+    assert "misc" not in entries    # no dominant category
+
+
+def test_confirmed_labels_win(training):
+    confirmed = pd.DataFrame({"description": ["UBER RIDE 9"], "category": ["office"],
+                              "gst_rate": [18]})
+    index = merchants.build_index(training, confirmed)
+    assert index["merchants"]["uber ride"] == {
+        "category": "office", "gst_rate": 18, "support": 1, "source": "confirmed",
+    }
+
+    # Carried over from a previous index when it is rebuilt from training
+    rebuilt = merchants.build_index(training, previous=index)
+    assert rebuilt["merchants"]["uber ride"]["source"] == "confirmed"
+
+
+def test_lookup(training):
+    index = merchants.build_index(training)
+    category, rate = merchants.lookup(["UBER RIDE 77", "UNKNOWN SHOP", None], index)
+
+    assert list(category[:1]) == ["travel"]
+    assert pd.isna(category[1:]).all()
+    assert rate[0] == 0 and np.isnan(rate[1:]).all()
+
+
+def test_confirm_labels_round_trip(tmp_path, training):
+    path = str(tmp_path / "merchants.json")
+    merchants.save_index(merchants.build_index(training), path)
+
+    added = merchants.confirm_labels(
+        pd.DataFrame({"description": ["IMPS/P2M/4123/ZOMATO"], "category": ["food"]}), path)
+    assert added == ["zomato"]
+
+    index = merchants.load_index(path)
+    assert index["merchants"]["zomato"]["source"] == "confirmed"
+    assert index["merchants"]["uber ride"]["source"] == "training"
@@ -0,0 +1,114 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src import db, parquet_store, pipeline, store
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "transactions_parquet")
+
+
+def _files(path):
+    return sorted(os.path.relpath(f, path) for _, f in parquet_store.partition_files(path=path))
+
+
+def test_saves_are_idempotent(classified, store_path):
+    counts = parquet_store.save_transactions(classified, store_path)
+    assert counts == {"inserted": 4, "updated": 0, "skipped": 0}
+    assert parquet_store.partition_months(store_path) == ["2024-04", "2024-05"]
+    files = _files(store_path)
+
+    assert parquet_store.save_transactions(classified, store_path) == {
+        "inserted": 0, "updated": 0, "skipped": 4}
+    assert _files(store_path) == files  # nothing rewritten or appended
+
+    stored = parquet_store.read_transactions(path=store_path)
+    assert len(stored) == 4 and stored["fingerprint"].is_unique
+
+
+def test_changed_rows_rewrite_one_month(classified, store_path):
+    parquet_store.save_transactions(classified, store_path)
+    april = [f for f in _files(store_path) if f.startswith("month=2024-04")]
+
+    changed = classified.copy()
+    changed.loc[1, ["predicted_category", "gst_rate"]] = ["office", 18]
+    counts = parquet_store.save_transactions(changed, store_path)
+    assert counts == {"inserted": 0, "updated": 1, "skipped": 3}
+
+    assert [f for f in _files(store_path) if f.startswith("month=2024-04")] != april
+    stored = parquet_store.read_transactions(path=store_path).set_index("description")
+    assert stored.loc["UBER RIDE", "predicted_category"] == "office"
+    assert len(stored) == 4
+
+
+def test_summaries_match_sqlite(classified, store_path, db_path):
+    parquet_store.save_transactions(classified, store_path)
+    db.save_transactions(classified, db_path)
+
+    assert parquet_store.summary_totals(path=store_path) == db.summary_totals(path=db_path)
+    assert parquet_store.summary_totals("2024-05", "2024-05", path=store_path)["txn_count"] == 2
+    for name in ["monthly_summary", "category_summary", "gst_summary"]:
+        pd.testing.assert_frame_equal(
+            getattr(parquet_store, name)(path=store_path), getattr(db, name)(path=db_path),
+            check_dtype=False,
+        )
+
+
+def _crash_mid_swap(classified, store_path):
+    """A rewrite of April that stopped after committing its journal."""
+    parquet_store.save_transactions(classified, store_path)
+    folder = os.path.join(store_path, "month=2024-04")
+    old = [n for n in os.listdir(folder) if n.endswith(".parquet")]
+
+    april = parquet_store.read_transactions(start_month="2024-04", end_month="2024-04",
+                                            path=store_path)
+    april["predicted_category"] = april["predicted_category"].astype(object)
+    april.loc[april["description"] == "UBER RIDE", "predicted_category"] = "office"
+    new = parquet_store._write_file(april, "2024-04", store_path, suffix=parquet_store.PENDING)
+    with open(os.path.join(folder, parquet_store.JOURNAL), "w", encoding="utf-8") as f:
+        json.dump({"file": os.path.basename(new), "replaces": old}, f)
+    return folder
+
+
+def test_readers_apply_an_interrupted_rewrite(classified, store_path):
+    _crash_mid_swap(classified, store_path)
+
+    stored = parquet_store.read_transactions(path=store_path)
+    assert len(stored) == 4  # the new file stands in for the old, never both
+    assert (stored["predicted_category"] == "office").sum() == 1
+
+
+def test_next_write_completes_an_interrupted_rewrite(classified, store_path):
+    folder = _crash_mid_swap(classified, store_path)
+    open(os.path.join(folder, "part-orphan.parquet.tmp"), "wb").close()
+
+    counts = parquet_store.save_transactions(classified.iloc[:1], store_path)
+    assert counts["inserted"] == 0
+
+    names = os.listdir(folder)
+    assert parquet_store.JOURNAL not in names
+    assert [n for n in names if not n.endswith(".parquet")] == []
+    assert len(parquet_store.read_transactions(path=store_path)) == 4
+
+
+def test_store_switch(workspace, monkeypatch):
+    assert store.store_name() == "sqlite"
+    monkeypatch.setenv(store.STORE_ENV, "parquet")
+    assert store.get_store() is parquet_store
+    assert store.default_path() == parquet_store.STORE_PATH
+    with pytest.raises(ValueError, match="Unknown transaction store"):
+        store.store_name("csv")
+
+    from benchmarks.synthetic import make_statement
+    make_statement(100, seed=2).to_csv("statement.csv", index=False)
+    counts = pipeline.ingest_file("statement.csv", batch_size=30)
+
+    assert counts["inserted"] == 100
+    assert parquet_store.summary_totals()["txn_count"] == 100
+    assert not os.path.exists(db.DB_PATH)
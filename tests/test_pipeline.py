@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_statement
+from src import db, pipeline
+
+
+@pytest.fixture
+def statement(workspace):
+    path = workspace / "statement.csv"
+    make_statement(500, seed=7).to_csv(path, index=False)
+    return path
+
+
+def _stored(path):
+    conn = db.get_connection(path)
+    return pd.read_sql_query(
+        "SELECT date, description, amount, predicted_category FROM transactions ORDER BY id", conn)
+
+
+def test_batches_match_one_pass(statement, db_path, tmp_path):
+    whole = str(tmp_path / "whole.db")
+    pipeline.ingest_file(str(statement), batch_size=10_000, path=whole)
+
+    sizes = []
+    counts = pipeline.ingest_file(str(statement), batch_size=64, path=db_path,
+                                  on_chunk=lambda chunk, c: sizes.append(len(chunk)))
+
+    assert sizes == [64] * 7 + [52]
+    assert counts == {"rows": 500, "inserted": 500, "updated": 0, "skipped": 0}
+    pd.testing.assert_frame_equal(_stored(db_path), _stored(whole))
+
+
+def test_reingesting_a_statement_is_a_no_op(statement, db_path):
+    pipeline.ingest_file(str(statement), batch_size=100, path=db_path)
+    before = db.summary_totals(path=db_path)
+
+    # Different batch boundaries must produce the same row fingerprints
+    counts = pipeline.ingest_file(str(statement), batch_size=37, path=db_path)
+
+    assert counts["inserted"] == 0 and counts["skipped"] == 500
+    assert db.summary_totals(path=db_path) == before
+    assert len(_stored(db_path)) == 500
+
+
+def test_xlsx_matches_csv(statement, workspace, db_path, tmp_path):
+    xlsx = workspace / "statement.xlsx"
+    pd.read_csv(statement).to_excel(xlsx, index=False)
+    csv_db = str(tmp_path / "csv.db")
+
+    pipeline.ingest_file(str(statement), batch_size=128, path=csv_db)
+    pipeline.ingest_file(str(xlsx), batch_size=128, path=db_path)
+
+    pd.testing.assert_frame_equal(_stored(db_path), _stored(csv_db))
+
+
+def test_unsupported_extension():
+    with pytest.raises(ValueError, match="Unsupported"):
+        pipeline.iter_upload_chunks("statement.txt")
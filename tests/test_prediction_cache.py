@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from src import prediction_cache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    yield str(tmp_path / "prediction_cache.db")
+    prediction_cache.close_connections()
+
+
+def _last_used(path, desc):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            "SELECT last_used FROM prediction_cache WHERE clean_desc = ?", (desc,)
+        ).fetchone()[0]
+
+
+def _age(path, seconds):
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE prediction_cache SET last_used = last_used - ?", (seconds,))
+
+
+def test_hit_and_miss(cache_path):
+    prediction_cache.store({"uber ride": ("travel", 0.9)}, "model-a", cache_path)
+
+    found = prediction_cache.lookup(["uber ride", "swiggy"], "model-a", cache_path)
+    assert found == {"uber ride": ("travel", 0.9)}
+    # Entries belong to one model version
+    assert prediction_cache.lookup(["uber ride"], "model-b", cache_path) == {}
+
+
+def test_stale_entries_are_dropped(cache_path):
+    prediction_cache.store({"uber ride": ("travel", 0.9)}, "model-a", cache_path)
+    _age(cache_path, prediction_cache.STALE_AFTER + 1)
+
+    prediction_cache.store({"swiggy": ("food", 0.8)}, "model-a", cache_path)
+    assert prediction_cache.lookup(["uber ride", "swiggy"], "model-a", cache_path) == {
+        "swiggy": ("food", 0.8),
+    }
+
+
+def test_lookup_refreshes_old_hits_only(cache_path):
+    prediction_cache.store({"uber ride": ("travel", 0.9)}, "model-a", cache_path)
+    stored = _last_used(cache_path, "uber ride")
+
+    prediction_cache.lookup(["uber ride"], "model-a", cache_path)
+    assert _last_used(cache_path, "uber ride") == stored
+
+    _age(cache_path, prediction_cache.TOUCH_AFTER + 1)
+    prediction_cache.lookup(["uber ride"], "model-a", cache_path)
+    assert _last_used(cache_path, "uber ride") > stored
+
+
+def test_lru_eviction(cache_path):
+    prediction_cache.store({"a": ("food", 0.9), "b": ("food", 0.9)}, "m", cache_path)
+    _age(cache_path, prediction_cache.TOUCH_AFTER + 1)
+    prediction_cache.lookup(["a"], "m", cache_path)  # b is now least recently used
+
+    prediction_cache.store({"c": ("travel", 0.7)}, "m", cache_path, max_entries=2)
+    assert set(prediction_cache.lookup(["a", "b", "c"], "m", cache_path)) == {"a", "c"}
+
+    with sqlite3.connect(cache_path) as conn:
+        (entries,) = conn.execute("SELECT entries FROM prediction_cache_size").fetchone()
+        (rows,) = conn.execute("SELECT COUNT(*) FROM prediction_cache").fetchone()
+    assert entries == rows == 2
+
+
+def test_restore_does_not_grow_count(cache_path):
+    for _ in range(3):
+        prediction_cache.store({"a": ("food", 0.9)}, "m", cache_path, max_entries=1)
+    with sqlite3.connect(cache_path) as conn:
+        assert conn.execute("SELECT entries FROM prediction_cache_size").fetchone() == (1,)
+
+
+def test_purge_keeps_one_model(cache_path):
+    prediction_cache.store({"a": ("food", 0.9)}, "old", cache_path)
+    prediction_cache.store({"a": ("travel", 0.9)}, "new", cache_path)
+
+    assert prediction_cache.purge("new", cache_path) == 1
+    assert prediction_cache.lookup(["a"], "old", cache_path) == {}
+    assert prediction_cache.lookup(["a"], "new", cache_path) == {"a": ("travel", 0.9)}
+
+
+def test_wal_and_reused_connection(cache_path):
+    conn = prediction_cache.get_connection(cache_path)
+    assert prediction_cache.get_connection(cache_path) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
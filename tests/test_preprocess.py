@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocess import (
+    clean_text, clean_text_series, detect_date_format, parse_amounts, prepare_dataframe,
+)
+
+TEXTS = [
+    "UPI/412345678901/SWIGGY/swiggy@ybl", "  Uber   RIDE\t34432 ", "", None, np.nan,
+    5, 5.0, "ÉCOLE café", "UPI/412345678901/SWIGGY/swiggy@ybl", "a--b__c",
+]
+
+
+def test_clean_text_series_matches_clean_text():
+    series = pd.Series(TEXTS, index=range(100, 110), dtype=object)
+    cleaned = clean_text_series(series)
+
+    assert cleaned.tolist() == [clean_text(t) for t in TEXTS]
+    assert list(cleaned.index) == list(series.index)
+
+
+def test_clean_text_series_string_dtype():
+    series = pd.Series(["Canva PRO", None, "canva pro"], dtype="string")
+    assert clean_text_series(series).tolist() == ["canva pro", "", "canva pro"]
+
+
+def test_parse_amounts_matches_safe_float():
+    from src.read_pdf import safe_float
+
+    values = ["1,234.50", "₹ 2,00,000", "", "-", None, "nan", "-12.5", "abc", "1e3", ".5", 7, 7.25]
+    parsed = parse_amounts(pd.Series(values, dtype=object))
+    assert parsed.tolist() == [safe_float(v) for v in values]
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("500.00 Dr", 500.0),
+    ("1,200.00 Cr", -1200.0),
+    ("1,200.00cr.", -1200.0),
+    ("(350.75)", -350.75),
+    ("350.75-", -350.75),
+    ("Rs. 99", 99.0),
+    ("INR 1,00,000.00 Dr", 100000.0),
+])
+def test_parse_amounts_markers(text, amount):
+    assert parse_amounts([text]).tolist() == [amount]
+
+
+def test_parse_amounts_numeric_column():
+    parsed = parse_amounts(pd.Series([1.5, np.nan, 3], index=[7, 8, 9]))
+    assert parsed.tolist() == [1.5, 0.0, 3.0]
+    assert list(parsed.index) == [7, 8, 9]
+
+
+def test_date_format_detected_once_per_statement():
+    first = pd.DataFrame({"Txn Date": ["01/02/2024", "13/04/2024"], "Narration": ["a", "b"],
+                          "Amount": [1, 2]})
+    fmt = detect_date_format(first)
+    assert fmt == "%d/%m/%Y"
+
+    # 01/02-12/02 alone are ambiguous; the statement's format reads them day-first
+    later = pd.DataFrame({"Txn Date": ["01/02/2024", "12/02/2024"], "Narration": ["c", "d"],
+                          "Amount": [3, 4]})
+    dates = prepare_dataframe(later, fmt)["date"]
+    assert dates.tolist() == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-12")]
+    assert detect_date_format(pd.DataFrame({"Narration": ["a"]})) is None
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src.read_pdf import iter_statement_chunks, normalize_statement_rows
+
+HEADER = ["txn date", "value date", "narration", "withdrawal amt", "deposit amt"]
+
+
+def test_duplicate_date_columns_keep_one_date():
+    df = normalize_statement_rows([["13/04/2024", "14/04/2024", "UPI/SWIGGY", "100.00", ""]], HEADER)
+    assert list(df.columns[:2]) == ["date", "value_date"]
+    assert isinstance(df["date"], pd.Series)
+
+
+def test_chunks_parse_dates_once_per_statement():
+    pages = [
+        [HEADER, ["13/04/2024", "14/04/2024", "UPI/SWIGGY", "100.00", ""]],
+        [HEADER, ["01/05/2024", "01/05/2024", "NEFT/SALARY", "", "5000.00"]],
+    ]
+    chunks = list(iter_statement_chunks(pages))
+    dates = pd.concat(chunks)["date"]
+    assert dates.tolist() == [pd.Timestamp("2024-04-13"), pd.Timestamp("2024-05-01")]
+
+
+def test_debit_credit_columns_are_magnitudes():
+    header = ["date", "narration", "withdrawal amt", "deposit amt"]
+    rows = [
+        ["01/04/2024", "a", "500.00 Dr", ""],
+        ["01/04/2024", "b", "", "1,200.00 Cr"],
+        ["01/04/2024", "c", "", "300"],
+    ]
+    df = normalize_statement_rows(rows, header)
+    assert df["amount"].tolist() == [500.0, -1200.0, -300.0]
+    assert df["credit"].tolist() == [0.0, 1200.0, 300.0]
+
+
+def test_single_amount_column_keeps_dr_cr_sign():
+    df = normalize_statement_rows(
+        [["01/04/2024", "a", "500.00 Dr"], ["01/04/2024", "b", "1,200.00 Cr"]],
+        ["date", "narration", "amount"],
+    )
+    assert df["amount"].tolist() == [500.0, -1200.0]